@@ -5,7 +5,11 @@ setup(
     packages=find_packages(),
     # Register the command line package as a console-script to go in $PATH
     entry_points = {
-        'console_scripts': ['runtwgb=twgamebook.command_line:main'],
+        'console_scripts': ['runtwgb=twgamebook.command_line:main',
+                            'runtwgbd=twgamebook.server:main',
+                            'runtwgbload=twgamebook.loadtest:main',
+                            'runtwgbdiff=twgamebook.differential:main',
+                            'runtwgbreplay=twgamebook.replay:main'],
     },
     install_requires = ['docopt', 'requests'],
     author='DJ Nrrd',
@@ -0,0 +1,122 @@
+from unittest import TestCase
+from twgamebook import analytics, story
+import json
+import os
+import tempfile
+
+GOOD_INPUTS = 'test_inputs/good_input.json'
+
+
+def write_story(path, stitches):
+    """Write a minimal inklewriter story starting at stitch 's0'"""
+    with open(path, 'w') as f:
+        json.dump({'title': 'Analytics', 'data': {
+            'editorData': {'authorName': 'Tests'}, 'initial': 's0',
+            'stitches': stitches}}, f)
+
+
+def option(link):
+    return {'option': f"Go #{link}", 'linkPath': link, 'ifConditions': None,
+            'notIfConditions': None}
+
+
+# Analyse the test story
+class TestTWGBAnalyticsLocal(TestCase):
+
+    def setUp(self):
+        self.analytics = analytics.TWGBAnalytics(
+            story.TWGBStory(GOOD_INPUTS))
+
+    def test_endings(self):
+        assert sorted(self.analytics.endings()) == ['asYouTurnToLookA',
+                                                    'ohhhYoureNICKEDB']
+
+    def test_path_counts(self):
+        assert self.analytics.path_counts() == {'asYouTurnToLookA': 2,
+                                                'ohhhYoureNICKEDB': 12}
+
+    def test_thread_lengths_matches_section(self):
+        # The longest thread after imAfraidThisHasH is 9 posts, and both
+        # threads after atTheEndOfTheTun are 3 posts
+        lengths = self.analytics.thread_lengths()
+        assert lengths['imAfraidThisHasH'][1] == 9
+        assert lengths['atTheEndOfTheTun'] == (3.0, 3)
+
+    def test_chain_posts_matches_section(self):
+        # ohDearIHaveSomeB is split into 2 posts
+        section = self.analytics.story.get_section('ohDearIHaveSomeB')
+        assert self.analytics.chain_posts()[self.analytics.index[
+            'ohDearIHaveSomeB']] == len(section) == 4
+
+    def test_longest_divert_chain(self):
+        length, chain = self.analytics.longest_divert_chain()
+        assert length == 10
+        assert chain[0] == 'youTellTheCarpen'
+        assert len(chain) == 11
+
+
+# Analyse generated stories with loops and long chains
+class TestTWGBAnalyticsGenerated(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'story.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_loop_condensed(self):
+        # s0 -> s1 | s2, s1 -> back to s0 | s3, s2 -> s3
+        write_story(self.path, {
+            's0': {'content': ['Start', option('s1'), option('s2')]},
+            's1': {'content': ['Loop', option('s0'), option('s3')]},
+            's2': {'content': ['Straight', {'divert': 's3'}]},
+            's3': {'content': ['The end']}})
+        my_analytics = analytics.TWGBAnalytics(story.TWGBStory(self.path))
+        assert my_analytics.component_count == 3
+        assert my_analytics.path_counts() == {'s3': 2}
+
+    def test_divert_loop(self):
+        write_story(self.path, {
+            's0': {'content': ['Start', option('s1'), option('s3')]},
+            's1': {'content': ['Round', {'divert': 's2'}]},
+            's2': {'content': ['And round', {'divert': 's1'}]},
+            's3': {'content': ['The end']}})
+        my_analytics = analytics.TWGBAnalytics(story.TWGBStory(self.path))
+        assert my_analytics.divert_chains()[1] == -1
+        assert my_analytics.thread_lengths() == {'s0': (2.0, 2)}
+
+    def test_long_stitch_posts(self):
+        write_story(self.path, {
+            's0': {'content': ['Start', option('s1'), option('s2')]},
+            's1': {'content': [' '.join(['word'] * 120), {'divert': 's2'}]},
+            's2': {'content': ['The end']}})
+        my_analytics = analytics.TWGBAnalytics(story.TWGBStory(self.path))
+        assert list(my_analytics.chain_posts()) == [2, 5, 2]
+        assert my_analytics.thread_lengths() == {'s0': (3.5, 5)}
+
+    def test_long_prompt_posts(self):
+        options = [{'option': f"Option number {x} goes somewhere far away "
+                              f"#OPT{x}", 'linkPath': 's1',
+                    'ifConditions': None, 'notIfConditions': None}
+                   for x in range(10)]
+        write_story(self.path, {
+            's0': {'content': ['Start', option('s1'), option('s2')]},
+            's1': {'content': ['Choose'] + options},
+            's2': {'content': ['The end']}})
+        my_story = story.TWGBStory(self.path)
+        my_analytics = analytics.TWGBAnalytics(my_story)
+        section = my_story.render_section('s1', [])[0]
+        assert len(section) > 2
+        assert my_analytics.chain_posts()[1] == len(section)
+
+    def test_long_chain(self):
+        count = 20000
+        stitches = {f"s{x}": {'content': [f"Part {x}",
+                                           {'divert': f"s{x + 1}"}]}
+                    for x in range(count)}
+        stitches[f"s{count}"] = {'content': ['The end']}
+        write_story(self.path, stitches)
+        my_analytics = analytics.TWGBAnalytics(story.TWGBStory(self.path))
+        assert my_analytics.longest_divert_chain()[0] == count
+        assert my_analytics.path_counts() == {f"s{count}": 1}
@@ -0,0 +1,54 @@
+from unittest import TestCase
+from random import Random
+from twgamebook import differential
+from twgamebook.game import LOGGER
+from twgamebook.story import TWGBStory
+
+
+# An engine that gets the notIfConditions wrong, which the harness must catch
+class _TWGBBrokenStory(TWGBStory):
+
+    def _pass_conditions(self, if_conditions=None, not_if_conditions=None,
+                         flags=None):
+        return super()._pass_conditions(if_conditions, None, flags)
+
+
+class TestTWGBRandomBook(TestCase):
+
+    def test_random_book_loads(self):
+        source_data = differential.random_book(Random(1), 30)
+        my_story = TWGBStory('<random>', source_data)
+        assert len(my_story.stitches) == 30
+        assert my_story.initial == 'stitch0'
+
+    def test_random_book_repeatable(self):
+        assert differential.random_book(Random(2)) == \
+            differential.random_book(Random(2))
+
+
+class TestTWGBCompareEngines(TestCase):
+
+    def test_compare_engines_match(self):
+        report = differential.compare_engines(books=10, stitch_count=25)
+        print(differential.format_report(report))
+        assert report['cases'] == 10 * 27 * 4
+        assert not report['mismatches']
+        assert report['candidate_per_second'] > 0
+
+    def test_compare_engines_log_isolated(self):
+        # Nothing from the random books may reach the game log
+        capture = differential._TWGBInfoCapture()
+        handlers = list(LOGGER.handlers)
+        LOGGER.addHandler(capture)
+        try:
+            differential.compare_engines(books=2, stitch_count=10)
+        finally:
+            LOGGER.removeHandler(capture)
+        assert capture.messages == []
+        assert LOGGER.handlers == handlers
+
+    def test_compare_engines_mismatch(self):
+        report = differential.compare_engines(books=10, stitch_count=25,
+                                              candidate=_TWGBBrokenStory)
+        print(differential.format_report(report))
+        assert report['mismatches']
@@ -0,0 +1,233 @@
+from unittest import TestCase
+from unittest import mock
+from collections import Counter
+from datetime import datetime, timedelta
+from twgamebook import game, story
+import json
+import os
+import tempfile
+
+GOOD_INPUTS = 'test_inputs/good_input.json'
+
+
+# Initialise a console game for tests to inherit from
+class TestTWGBGameLocal(TestCase):
+
+    def setUp(self):
+        self.story = story.TWGBStory(GOOD_INPUTS)
+        self.game = game.TWGBConsoleGame(self.story, '1m')
+
+
+# Check the sections rendered while the vote is open
+class TestTWGBGameSpeculate(TestTWGBGameLocal):
+
+    def setUp(self):
+        super().setUp()
+        self.story.set_flags(['has_ring'])
+        self.valid_hashtags = self.story.get_hashtags('youPushTheCrateA')
+        self.speculated = self.game._speculate('youPushTheCrateA',
+                                               self.valid_hashtags)
+
+    def test_speculate_keys(self):
+        assert sorted(self.speculated) == sorted(self.valid_hashtags.values())
+
+    def test_speculate_no_side_effects(self):
+        for future in self.speculated.values():
+            future.result()
+        assert self.story.flags == ['has_ring']
+
+    def test_get_section_speculated(self):
+        key = self.valid_hashtags['#RING']
+        expected = story.TWGBStory(GOOD_INPUTS)
+        expected.set_flags(['has_ring'])
+        assert self.game._get_section(key, self.speculated) == \
+            expected.get_section(key)
+        assert self.story.flags == expected.flags
+
+    def test_get_section_not_speculated(self):
+        section = self.game._get_section('youFindASovereig', self.speculated)
+        assert section[-1].startswith('Should we:')
+
+    def test_speculate_off(self):
+        self.game.speculate = False
+        assert self.game._speculate('youPushTheCrateA',
+                                    self.valid_hashtags) == {}
+
+
+# Check what is posted again after a tied vote
+class TestTWGBGameTie(TestTWGBGameLocal):
+
+    def setUp(self):
+        super().setUp()
+        self.story.set_flags(['has_ring'])
+        self.valid_hashtags = self.story.get_hashtags('youPushTheCrateA')
+        self.user_hashtags = ['#TUNNELS', '#RING', '#TUNNELS', '#RING',
+                              '#BACK']
+
+    def test_tie_prompt(self):
+        thread = self.game._get_tie_prompt('youPushTheCrateA',
+                                           self.user_hashtags,
+                                           self.valid_hashtags)
+        assert thread == ['Should we:\n\n* Tell her about the #tunnels\n* '
+                          'Show her the #ring\n\nReply to this tweet with '
+                          'your preferred Hashtag']
+        assert self.story.flags == ['has_ring']
+
+    def test_tie_runoff(self):
+        self.story.set_flags([])
+        valid_hashtags = self.story.get_hashtags('oppositeTheChamb')
+        self.game.tie_break = 'runoff'
+        thread = self.game._get_tie_prompt('oppositeTheChamb',
+                                           ['#LEFT', '#FIRE', '#RIGHT',
+                                            '#FIRE', '#LEFT'],
+                                           valid_hashtags)
+        assert thread == ['Should we:\n\n* Go #Left\n* Investigate the '
+                          '#fire\n\nReply to this tweet with your preferred '
+                          'Hashtag']
+
+    def test_tie_runoff_hidden_option(self):
+        # #FIRE is hidden once the ring is taken, leaving nothing to run off
+        # against #LEFT, so every option that can be shown is posted again
+        valid_hashtags = self.story.get_hashtags('oppositeTheChamb')
+        self.game.tie_break = 'runoff'
+        thread = self.game._get_tie_prompt('oppositeTheChamb',
+                                           ['#FIRE', '#LEFT', '#FIRE',
+                                            '#LEFT', '#RIGHT'],
+                                           valid_hashtags)
+        assert thread == ['Should we:\n\n* Go #Left\n* Go #Right\n\nReply to '
+                          'this tweet with your preferred Hashtag']
+        assert self.story.flags == ['has_ring']
+
+    def test_tie_one_option(self):
+        # Without the ring only #TUNNELS can be followed, so it is
+        self.story.set_flags([])
+        thread = self.game._get_tie_prompt('youPushTheCrateA',
+                                           self.user_hashtags,
+                                           self.valid_hashtags)
+        expected = story.TWGBStory(GOOD_INPUTS)
+        assert thread == expected.get_section('ohDearIHaveSomeB')
+        assert self.story.flags == expected.flags
+
+    def test_runoff_hashtags(self):
+        assert self.game._get_hashtags('oppositeTheChamb', ['#LEFT']) == \
+            {'#LEFT': 'asYouCrawlThroug'}
+
+    def test_tie_break_raises(self):
+        self.assertRaises(ValueError, game.TWGBConsoleGame, self.story, '1m',
+                          tie_break='coin')
+
+
+# Check that replies are gathered incrementally from the saved cursor
+class TestTWGBGameReplyCursor(TestTWGBGameLocal):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.game.cursor_file = os.path.join(self.tmp_dir.name,
+                                             'twgamebook.cursor')
+        self.last_time = datetime.now() - timedelta(minutes=2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_replies_tallied(self):
+        replies = [(2, ['#RIGHT']), (1, ['#LEFT', '#RIGHT'])]
+        with mock.patch.object(self.game, '_get_replies',
+                               return_value=replies):
+            hashtags = self.game._sleep_for_replies(1234, self.last_time)
+        assert Counter(hashtags) == Counter({'#RIGHT': 2, '#LEFT': 1})
+
+    def test_cursor_saved(self):
+        with mock.patch.object(self.game, '_get_replies',
+                               return_value=[(7, ['#LEFT'])]):
+            self.game._sleep_for_replies(1234, self.last_time)
+        with open(self.game.cursor_file, 'r') as f:
+            assert json.load(f) == {'tweet_id': '1234', 'since_id': 7,
+                                    'replies': 1, 'tally': {'#LEFT': 1}}
+
+    def test_cursor_resumed(self):
+        self.game._save_cursor({'tweet_id': '1234', 'since_id': 5,
+                                'replies': 2, 'tally': Counter({'#LEFT': 2})})
+        replies = [(4, ['#RIGHT']), (6, ['#LEFT'])]
+        with mock.patch.object(self.game, '_get_replies',
+                               return_value=replies) as get_replies:
+            hashtags = self.game._sleep_for_replies('1234', self.last_time)
+        get_replies.assert_called_with('1234', 5)
+        assert Counter(hashtags) == Counter({'#LEFT': 3})
+
+    def test_cursor_other_tweet(self):
+        self.game._save_cursor({'tweet_id': '99', 'since_id': 5,
+                                'replies': 2, 'tally': Counter({'#LEFT': 2})})
+        cursor = self.game._load_cursor(1234)
+        assert cursor['since_id'] == 0
+        assert cursor['tally'] == Counter()
+
+
+# Check when the vote can close before the sleep time is up
+class TestTWGBGameEarlyClose(TestTWGBGameLocal):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.game.cursor_file = os.path.join(self.tmp_dir.name,
+                                             'twgamebook.cursor')
+        self.game.audience = 10
+        self.valid_hashtags = self.story.get_hashtags('oppositeTheChamb')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def cursor(self, replies, tally):
+        return {'tweet_id': '1234', 'since_id': replies, 'replies': replies,
+                'tally': Counter(tally)}
+
+    def test_vote_decided_lead(self):
+        cursor = self.cursor(8, {'#LEFT': 7, '#RIGHT': 1})
+        self.assertTrue(self.game._vote_decided(cursor, self.valid_hashtags))
+
+    def test_vote_not_decided_lead(self):
+        cursor = self.cursor(7, {'#LEFT': 5, '#RIGHT': 2})
+        self.assertFalse(self.game._vote_decided(cursor, self.valid_hashtags))
+
+    def test_vote_not_decided_tie(self):
+        cursor = self.cursor(4, {'#LEFT': 2, '#RIGHT': 2})
+        self.assertFalse(self.game._vote_decided(cursor, self.valid_hashtags))
+
+    def test_vote_decided_audience(self):
+        cursor = self.cursor(10, {'#LEFT': 5, '#RIGHT': 5})
+        self.assertTrue(self.game._vote_decided(cursor, self.valid_hashtags))
+
+    def test_vote_decided_invalid_hashtags(self):
+        cursor = self.cursor(8, {'#UP': 8})
+        self.assertFalse(self.game._vote_decided(cursor, self.valid_hashtags))
+
+    def test_vote_decided_no_audience(self):
+        self.game.audience = 0
+        cursor = self.cursor(8, {'#LEFT': 8})
+        self.assertFalse(self.game._vote_decided(cursor, self.valid_hashtags))
+
+    def test_sleep_closes_early(self):
+        self.game.sleep_time = timedelta(days=1)
+        replies = [(x, ['#LEFT']) for x in range(1, 7)]
+        with mock.patch.object(self.game, '_get_replies',
+                               return_value=replies):
+            hashtags = self.game._sleep_for_replies(1234, datetime.now(),
+                                                    self.valid_hashtags)
+        assert hashtags == ['#LEFT'] * 6
+
+
+# Check a reload that fails keeps the loaded story
+class TestTWGBGameReload(TestTWGBGameLocal):
+
+    def test_reload_source_down(self):
+        import requests
+        stitches = self.story.stitches
+        with mock.patch.object(self.story, 'reload',
+                               side_effect=requests.ConnectionError('down')):
+            self.assertFalse(self.game._reload_story('oppositeTheChamb'))
+        assert self.story.stitches is stitches
+
+    def test_reload_invalid_edit(self):
+        with mock.patch.object(self.story, 'reload',
+                               side_effect=KeyError('oppositeTheChamb')):
+            self.assertFalse(self.game._reload_story('oppositeTheChamb'))
@@ -0,0 +1,52 @@
+from unittest import TestCase
+import os
+import subprocess
+import sys
+
+# Modules that should only be imported on the code path that needs them
+HEAVY_MODULES = ['requests', 'docopt']
+# Generous ceiling for the cumulative import of the package, in microseconds
+MAX_IMPORT_US = 500000
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """Import a module in a fresh interpreter with -X importtime
+
+    :param module: The dotted module name to import
+    :type module: str
+    :return: Cumulative import time in microseconds for each imported module
+    :rtype: dict
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                           f"import {module}"], cwd=REPO_ROOT,
+                          capture_output=True, text=True, check=True)
+    ret_dict = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        ret_dict[fields[2].strip()] = int(fields[1])
+    return ret_dict
+
+
+# Guard against heavy dependencies creeping back into import time
+class TestImportTime(TestCase):
+
+    def test_command_line_lazy_imports(self):
+        times = import_times('twgamebook.command_line')
+        loaded = [x for x in HEAVY_MODULES if x in times]
+        assert loaded == []
+        print(f"Heavy modules loaded: {loaded}")
+
+    def test_story_lazy_imports(self):
+        times = import_times('twgamebook.story')
+        loaded = [x for x in HEAVY_MODULES if x in times]
+        assert loaded == []
+        print(f"Heavy modules loaded: {loaded}")
+
+    def test_command_line_import_time(self):
+        times = import_times('twgamebook.command_line')
+        assert times['twgamebook.command_line'] < MAX_IMPORT_US
+        print(f"Import time: {times['twgamebook.command_line']}us")
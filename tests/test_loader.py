@@ -0,0 +1,74 @@
+from unittest import TestCase
+from twgamebook import loader
+import json
+import os
+import shutil
+import tempfile
+
+GOOD_INPUTS = 'test_inputs/good_input.json'
+BAD_JSON = 'test_inputs/bad_json.json'
+
+
+# Build a directory of stories for tests to inherit from
+class TestTWGBLoader(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        with open(GOOD_INPUTS, 'r') as f:
+            source_data = json.load(f)
+        self.sources = []
+        for x in range(3):
+            source_data['title'] = f"The Cave of Tests {x}"
+            path = os.path.join(self.tmp_dir.name, f"story{x}.json")
+            with open(path, 'w') as f:
+                json.dump(source_data, f)
+            self.sources.append(path)
+        self.registry = loader.load_directory(self.tmp_dir.name, processes=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+class TestTWGBLoaderRegistry(TestTWGBLoader):
+
+    def test_registry_len(self):
+        assert len(self.registry) == 3
+
+    def test_registry_by_title(self):
+        story = self.registry['The Cave of Tests 1']
+        assert story.source == self.sources[1]
+
+    def test_registry_by_source(self):
+        assert self.registry[self.sources[2]].title == 'The Cave of Tests 2'
+
+    def test_registry_timings(self):
+        timings = self.registry.timings[self.sources[0]]
+        assert sorted(timings) == ['compile', 'parse', 'read', 'total']
+
+    def test_registry_stories_play(self):
+        for story in self.registry:
+            assert len(story.get_section()) == 4
+
+    def test_shared_strings(self):
+        first = self.registry[self.sources[0]]._get_stitch('oppositeTheChamb')
+        second = self.registry[self.sources[1]]._get_stitch('oppositeTheChamb')
+        assert first.key is second.key
+        assert first.options[0]['option'] is second.options[0]['option']
+
+
+class TestTWGBLoaderErrors(TestTWGBLoader):
+
+    def test_load_errors(self):
+        bad_json = os.path.join(self.tmp_dir.name, 'bad.json')
+        shutil.copy(BAD_JSON, bad_json)
+        registry = loader.load_stories(
+            self.sources + [bad_json, '/no/file/here'], processes=0)
+        assert len(registry) == 3
+        assert sorted(registry.errors) == ['/no/file/here', bad_json]
+        assert isinstance(registry.errors['/no/file/here'], ValueError)
+
+    def test_load_processes(self):
+        registry = loader.load_stories(self.sources, processes=1,
+                                       parse_process_bytes=0)
+        assert len(registry) == 3
+        assert registry[self.sources[0]].initial == 'youHaveDiscovere'
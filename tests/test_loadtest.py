@@ -0,0 +1,43 @@
+from unittest import TestCase
+from twgamebook import loadtest
+import os
+
+GOOD_INPUTS = 'test_inputs/good_input.json'
+
+
+class TestTWGBLoadTestPercentile(TestCase):
+
+    def test_percentile(self):
+        values = list(range(100, 0, -1))
+        assert loadtest.percentile(values, 50) == 50
+        assert loadtest.percentile(values, 99) == 99
+        assert loadtest.percentile(values, 100) == 100
+
+    def test_percentile_small(self):
+        assert loadtest.percentile([3, 1, 2], 95) == 3
+        assert loadtest.percentile([], 50) == 0
+
+
+# Run a small load test across more turns than the story has
+class TestTWGBLoadTest(TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.report = loadtest.load_test(GOOD_INPUTS, games=2, turns=15,
+                                         votes=5)
+
+    def test_load_test_turns(self):
+        assert self.report['turns'] == 30
+        print(loadtest.format_report(self.report))
+
+    def test_load_test_posts(self):
+        assert self.report['posts'] > self.report['turns']
+        assert self.report['posts_per_second'] > 0
+
+    def test_load_test_latency(self):
+        assert 0 < self.report['p50'] <= self.report['p95'] <= \
+            self.report['p99']
+
+    def test_load_test_usage(self):
+        assert self.report['rss'] > 0
+        assert os.getcwd() == self.cwd
@@ -0,0 +1,91 @@
+from unittest import TestCase
+from unittest import mock
+from logging import handlers
+from twgamebook import logs
+import logging
+import os
+import tempfile
+
+GAME_LOG = 'Apr 23 21:47 - INFO - oppositeTheChamb - ["has_ring"]\n'
+TWEET_LOG = 'Apr 23 21:47 - INFO - 669401\n'
+DEBUG_LOG = 'Apr 23 21:47 - DEBUG - using Stitch ID oppositeTheChamb\n'
+
+
+# Build a log directory with a rotated segment for tests to inherit from
+class TestTWGBLogs(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'twgamebook.log')
+        self.write(f"{self.path}.2", [GAME_LOG, TWEET_LOG])
+        self.write(f"{self.path}.1", [DEBUG_LOG, GAME_LOG])
+        self.write(self.path, [TWEET_LOG, DEBUG_LOG])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, path, lines):
+        with open(path, 'w') as f:
+            f.writelines(lines)
+
+
+class TestTWGBLogsRead(TestTWGBLogs):
+
+    def test_log_segments(self):
+        assert logs.log_segments(self.path) == [self.path, f"{self.path}.1",
+                                                f"{self.path}.2"]
+
+    def test_log_segments_dated(self):
+        self.write(f"{self.path}.2020-04-23", [])
+        self.write(f"{self.path}.2020-04-24", [])
+        assert logs.log_segments(self.path)[-2:] == [
+            f"{self.path}.2020-04-24", f"{self.path}.2020-04-23"]
+
+    def test_log_segments_no_log(self):
+        assert logs.log_segments('/no/file/here') == []
+
+    def test_last_info_lines_across_segments(self):
+        assert logs.last_info_lines(self.path, 2) == [GAME_LOG[:-1],
+                                                      TWEET_LOG[:-1]]
+
+    def test_last_info_lines_short(self):
+        assert len(logs.last_info_lines(self.path, 10)) == 4
+
+    def test_read_lines_backwards_small_blocks(self):
+        with mock.patch.object(logs, 'BLOCK_SIZE', 7):
+            lines = list(logs.read_lines_backwards(f"{self.path}.1"))
+        assert lines == [GAME_LOG[:-1], DEBUG_LOG[:-1]]
+
+    def test_info_lines(self):
+        assert list(logs.info_lines(self.path)) == [
+            GAME_LOG[:-1], TWEET_LOG[:-1], GAME_LOG[:-1], TWEET_LOG[:-1]]
+
+
+class TestTWGBLogsCompact(TestTWGBLogs):
+
+    def test_compact_log(self):
+        logs.compact_log(f"{self.path}.1")
+        with open(f"{self.path}.1", 'r') as f:
+            assert f.readlines() == [GAME_LOG]
+
+    def test_compacting_rotator(self):
+        logger = logging.getLogger('twgamebook.test_logs')
+        logger.propagate = False
+        log_fh = handlers.RotatingFileHandler(self.path, maxBytes=100,
+                                              backupCount=10)
+        log_fh.setFormatter(logging.Formatter('%(message)s'))
+        log_fh.rotator = logs.compacting_rotator
+        logger.addHandler(log_fh)
+        try:
+            for x in range(10):
+                logger.warning(DEBUG_LOG[:-1])
+                logger.warning(GAME_LOG[:-1])
+                logger.warning(TWEET_LOG[:-1])
+        finally:
+            logger.removeHandler(log_fh)
+            log_fh.close()
+        assert len(logs.log_segments(self.path)) > 2
+        assert logs.last_info_lines(self.path, 2) == [GAME_LOG[:-1],
+                                                      TWEET_LOG[:-1]]
+        with open(f"{self.path}.1", 'r') as f:
+            assert DEBUG_LOG not in f.readlines()
@@ -0,0 +1,98 @@
+from unittest import TestCase
+from unittest import mock
+from twgamebook import game, metrics, story
+import json
+import os
+import tempfile
+import threading
+
+GOOD_INPUTS = 'test_inputs/good_input.json'
+
+
+# Initialise an instrumented console game for tests to inherit from
+class TestTWGBMetricsGame(TestCase):
+
+    def setUp(self):
+        self.sink = metrics.TWGBMemorySink()
+        self.metrics = metrics.TWGBMetrics([self.sink])
+        self.story = story.TWGBStory(GOOD_INPUTS)
+        self.game = game.TWGBConsoleGame(self.story, '1m',
+                                         metrics=self.metrics)
+
+
+class TestTWGBMetricsInstrument(TestTWGBMetricsGame):
+
+    def test_instrument_recursive_once(self):
+        self.story.get_section()
+        assert self.metrics.timers['get_section']['count'] == 1
+        print(f"get_section timer: {self.metrics.timers['get_section']}")
+
+    def test_instrument_game_method(self):
+        self.game._check_votes(['#LEFT'], {'#LEFT': 'asYouCrawlThroug'})
+        assert self.metrics.timers['_check_votes']['count'] == 1
+
+    def test_instrument_get_replies(self):
+        # Console and load test games fetch replies without Twitter
+        with mock.patch('builtins.input', return_value='#LEFT'):
+            self.game._get_replies(1, 0)
+        assert self.metrics.timers['_get_replies']['count'] == 1
+
+    def test_instrument_result_unchanged(self):
+        votes = self.game._check_votes(['#LEFT'],
+                                       {'#LEFT': 'asYouCrawlThroug'})
+        assert votes == ('* #LEFT - 1 votes\n', 'asYouCrawlThroug')
+
+    def test_uninstrumented_game(self):
+        my_game = game.TWGBConsoleGame(story.TWGBStory(GOOD_INPUTS), '1m')
+        assert '_check_votes' not in vars(my_game)
+
+    def test_flush_memory_sink(self):
+        self.metrics.count('turns')
+        self.metrics.flush()
+        assert self.sink.snapshots[-1]['counters'] == {'turns': 1}
+
+    def test_snapshot_while_recording(self):
+        # Speculation threads record timings while the game loop flushes
+        def record():
+            for x in range(2000):
+                self.metrics.record(f"timer_{x}", 0.001)
+                self.metrics.count(f"counter_{x}")
+        threads = [threading.Thread(target=record) for x in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(x.is_alive() for x in threads):
+            self.metrics.snapshot()
+        for thread in threads:
+            thread.join()
+        assert self.metrics.snapshot()['timers']['timer_0']['count'] == 4
+        assert self.metrics.counters['counter_1999'] == 4
+
+
+class TestTWGBMetricsSinks(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.metrics = metrics.TWGBMetrics()
+        self.metrics.count('turns', 2)
+        self.metrics.record('get_section', 0.5)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_prometheus_sink(self):
+        path = os.path.join(self.tmp_dir.name, 'twgamebook.prom')
+        metrics.get_sink(path).emit(self.metrics.snapshot())
+        with open(path, 'r') as f:
+            lines = f.read().splitlines()
+        assert 'twgamebook_turns_total 2' in lines
+        assert 'twgamebook_get_section_seconds_sum 0.500000' in lines
+
+    def test_json_lines_sink(self):
+        path = os.path.join(self.tmp_dir.name, 'twgamebook.jsonl')
+        sink = metrics.get_sink(path)
+        sink.emit(self.metrics.snapshot())
+        sink.emit(self.metrics.snapshot())
+        with open(path, 'r') as f:
+            lines = [json.loads(x) for x in f]
+        assert len(lines) == 2
+        assert lines[0]['timers']['get_section']['count'] == 1
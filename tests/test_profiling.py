@@ -0,0 +1,43 @@
+from unittest import TestCase
+from twgamebook import metrics, profiling, story
+import os
+import tempfile
+
+GOOD_INPUTS = 'test_inputs/good_input.json'
+
+
+# Profile a couple of turns of story sections
+class TestTWGBProfiler(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'profile.txt')
+        self.profiler = profiling.TWGBProfiler(self.path, limit=5)
+        self.metrics = metrics.TWGBMetrics([self.profiler])
+        self.story = story.TWGBStory(GOOD_INPUTS)
+        self.metrics.instrument(self.story, ['get_section'])
+        self.profiler.start()
+        self.story.get_section()
+        self.metrics.flush()
+        self.story.get_section('youPushTheCrateA')
+        self.profiler.stop()
+        with open(self.path, 'r') as f:
+            self.summary = f.read()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_profile_turns(self):
+        assert '=== Turn 1 ===' in self.summary
+        assert '=== Turn 2 ===' in self.summary
+        assert '=== Turn 3 ===' not in self.summary
+
+    def test_profile_functions(self):
+        assert 'Top cumulative functions:' in self.summary
+        assert 'get_section' in self.summary
+
+    def test_profile_timers(self):
+        assert '  get_section: 1 calls' in self.summary
+
+    def test_profile_allocations(self):
+        assert 'Top allocation sites:' in self.summary
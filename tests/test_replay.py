@@ -0,0 +1,98 @@
+from unittest import TestCase
+from twgamebook import replay, story
+import json
+import os
+import tempfile
+
+GOOD_INPUTS = 'test_inputs/good_input.json'
+
+
+# Write the log of a game through to its end, with a tied vote on the way
+# and a runoff between #CRATE and #BACK. #SMITHY and #CARPENTER both end the
+# game, so the last turn can not be told apart
+class TestTWGBReplay(TestCase):
+
+    choices = ['#RIGHT', '#CRATE', '#HOME', '#SMITHY']
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'twgamebook.log')
+        self.story = story.TWGBStory(GOOD_INPUTS)
+        self.threads = []
+        lines = []
+        tweet_id = 0
+        choices = list(self.choices)
+        section = self.story.render_section('', [])
+        flags = []
+        while True:
+            self.threads.append(section[0])
+            flags = flags + section[1]
+            tweet_id += 10
+            lines += section[2] + [str(tweet_id)]
+            state = replay.parse_state(section[2][-1])
+            if state is None:
+                break
+            hashtags = self.story.get_hashtags(state[0])
+            if len(self.threads) == 2:
+                section = self.story.render_options_prompt(
+                    state[0], list(hashtags)[:2], flags)
+            else:
+                section = self.story.render_section(
+                    hashtags[choices.pop(0)], flags)
+        with open(self.path, 'w') as f:
+            for line in lines:
+                f.write(f"Apr 23 21:47 - INFO - {line}\n")
+                f.write('Apr 23 21:47 - DEBUG - using Stitch ID\n')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_turns(self):
+        turns = list(replay.turns(self.path))
+        assert len(turns) == len(self.threads)
+        assert turns[0][2] == 10
+        assert turns[-1][1][-1].startswith('GAMEEND')
+
+    def test_replay_threads(self):
+        turns = list(replay.replay(self.story, self.path))
+        assert [x['thread'] for x in turns[:-1]] == self.threads[:-1]
+        print(''.join(replay.format_turn(x) for x in turns))
+
+    def test_replay_ambiguous(self):
+        turns = list(replay.replay(self.story, self.path))
+        assert turns[-1]['thread'] is None
+        assert turns[-1]['start'] is None
+        assert sorted(turns[-1]['ambiguous']) == ['dismayedYouSlowl',
+                                                  'slowlyYouCrawlBa']
+        assert 'Could not tell which of' in replay.format_turn(turns[-1])
+        assert all(not x['ambiguous'] for x in turns[:-1])
+
+    def test_replay_tie(self):
+        turns = list(replay.replay(self.story, self.path))
+        assert turns[2]['start'] == 'youCrawlThroughT'
+        assert json.loads(turns[2]['state'][0].split(' - ')[2]) == \
+            ['#CRATE', '#BACK']
+        assert turns[2]['thread'][0].startswith('Should we:')
+
+    def test_replay_rotated_start(self):
+        with open(self.path) as f:
+            lines = f.readlines()
+        with open(self.path, 'w') as f:
+            f.writelines(lines[4:])
+        turns = list(replay.replay(self.story, self.path))
+        assert turns[0]['thread'] is None
+        assert 'Could not replay' in replay.format_turn(turns[0])
+        assert [x['thread'] for x in turns[1:-1]] == self.threads[2:-1]
+
+
+# The same game won by #CARPENTER, which must not be replayed as #SMITHY
+class TestTWGBReplayCarpenter(TestTWGBReplay):
+
+    choices = ['#RIGHT', '#CRATE', '#HOME', '#CARPENTER']
+
+    def test_replay_not_smithy(self):
+        turns = list(replay.replay(self.story, self.path))
+        smithy = self.story.render_section('dismayedYouSlowl', [])[0]
+        assert self.threads[-1] != smithy
+        assert turns[-1]['thread'] is None
+        assert turns[-1]['start'] != 'dismayedYouSlowl'
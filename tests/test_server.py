@@ -0,0 +1,91 @@
+from unittest import TestCase
+from twgamebook import game, loader, server, story
+import os
+import tempfile
+import threading
+
+GOOD_INPUTS = 'test_inputs/good_input.json'
+
+
+# Serve the test story for tests to inherit from
+class TestTWGBSectionServer(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.socket_path = os.path.join(cls.tmp_dir.name, 'twgamebook.sock')
+        registry = loader.load_stories([GOOD_INPUTS], processes=0)
+        cls.server = server.TWGBSectionServer(cls.socket_path, registry)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        cls.tmp_dir.cleanup()
+
+    def setUp(self):
+        self.client = server.TWGBStoryClient(self.socket_path,
+                                             'The Cave of Tests')
+        self.story = story.TWGBStory(GOOD_INPUTS)
+
+    def tearDown(self):
+        self.client.close()
+
+
+class TestTWGBStoryClient(TestTWGBSectionServer):
+
+    def test_client_info(self):
+        assert self.client.title == 'The Cave of Tests'
+        assert self.client.initial == 'youHaveDiscovere'
+
+    def test_client_by_source(self):
+        client = server.TWGBStoryClient(self.socket_path, GOOD_INPUTS)
+        assert client.author == 'DJ Nrrd'
+        client.close()
+
+    def test_client_get_section(self):
+        for x in [self.client, self.story]:
+            x.set_flags(['has_ring'])
+        assert self.client.get_section('youFindYourselfO') == \
+            self.story.get_section('youFindYourselfO')
+        assert self.client.flags == self.story.flags
+
+    def test_client_get_hashtags(self):
+        assert self.client.get_hashtags('oppositeTheChamb') == \
+            self.story.get_hashtags('oppositeTheChamb')
+
+    def test_client_get_options_prompt(self):
+        assert self.client.get_options_prompt('oppositeTheChamb',
+                                              ['#LEFT', '#RIGHT']) == \
+            self.story.get_options_prompt('oppositeTheChamb',
+                                          ['#LEFT', '#RIGHT'])
+
+    def test_client_render_sections(self):
+        keys = list(self.story.get_hashtags('oppositeTheChamb').values())
+        assert self.client.render_sections(keys) == \
+            [self.story.render_section(x) for x in keys]
+
+    def test_client_pipeline_deep(self):
+        calls = [('hashtags', 'oppositeTheChamb')] * \
+            (server.PIPELINE_DEPTH * 2 + 1)
+        assert len(self.client.pipeline(calls)) == len(calls)
+
+    def test_client_raises(self):
+        self.assertRaises(KeyError, self.client.get_section, 'INVALIDKEY')
+        self.assertRaises(KeyError, self.client.get_hashtags, 000)
+        # The connection is still usable after an error
+        assert self.client.get_hashtags('oppositeTheChamb')
+
+    def test_client_unknown_story(self):
+        self.assertRaises(KeyError, server.TWGBStoryClient, self.socket_path,
+                          'No Such Story')
+
+    def test_client_in_game(self):
+        my_game = game.TWGBConsoleGame(self.client, '1m')
+        valid_hashtags = self.client.get_hashtags('oppositeTheChamb')
+        speculated = my_game._speculate('oppositeTheChamb', valid_hashtags)
+        assert my_game._get_section('youFindASovereig', speculated) == \
+            self.story.get_section('youFindASovereig')
@@ -0,0 +1,174 @@
+from unittest import TestCase
+from unittest import mock
+from collections import Counter
+from datetime import datetime
+from twgamebook import game, snapshot, story
+import logging
+import os
+import tempfile
+
+GOOD_INPUTS = 'test_inputs/good_input.json'
+LAST_POS = (datetime(2020, 4, 23, 21, 47), 'oppositeTheChamb', ['has_ring'],
+            '669401', ['#LEFT', '#RIGHT'])
+
+
+# Initialise a console game part way through a runoff vote
+class TestTWGBSnapshot(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.story = story.TWGBStory(GOOD_INPUTS)
+        self.game = game.TWGBConsoleGame(self.story, '1m')
+        self.game.cursor_file = os.path.join(self.tmp_dir.name,
+                                             'twgamebook.cursor')
+        self.game._save_cursor({'tweet_id': '669401', 'since_id': 12,
+                                'replies': 3,
+                                'tally': Counter({'#LEFT': 2, '#RIGHT': 1})})
+        with mock.patch.object(self.game, '_load_last_log',
+                               return_value=LAST_POS):
+            self.snapshot = self.game.snapshot()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+class TestTWGBSnapshotSave(TestTWGBSnapshot):
+
+    def test_snapshot_from_game(self):
+        assert self.snapshot.bookmark == 'oppositeTheChamb'
+        assert self.snapshot.flags == ['has_ring']
+        assert self.snapshot.tweet_id == 669401
+        assert self.snapshot.runoff == ['#LEFT', '#RIGHT']
+        assert self.snapshot.since_id == 12
+        assert self.snapshot.tally == Counter({'#LEFT': 2, '#RIGHT': 1})
+
+    def test_snapshot_bytes(self):
+        data = self.snapshot.to_bytes()
+        print(data)
+        assert snapshot.TWGBSnapshot.from_bytes(data) == self.snapshot
+
+    def test_snapshot_bad_bytes(self):
+        with self.assertRaises(ValueError):
+            snapshot.TWGBSnapshot.from_bytes(b'{"not": "a snapshot"}')
+        with self.assertRaises(ValueError):
+            snapshot.TWGBSnapshot.from_bytes(b'not json')
+
+    def test_snapshot_new_game(self):
+        with mock.patch.object(self.game, '_load_last_log', return_value=()):
+            new_game = self.game.snapshot()
+        assert new_game.bookmark == ''
+        assert not new_game.ended
+
+    def test_snapshot_ended_game(self):
+        with mock.patch.object(self.game, '_load_last_log',
+                               return_value='GAMEEND The Cave of Tests'):
+            assert self.game.snapshot().ended
+
+
+class TestTWGBSnapshotRestore(TestTWGBSnapshot):
+
+    def setUp(self):
+        super().setUp()
+        os.remove(self.game.cursor_file)
+        self.log_path = os.path.join(self.tmp_dir.name, 'twgamebook.log')
+        self.handler = logging.FileHandler(self.log_path)
+        self.handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(levelname)s - %(message)s',
+            datefmt='%b %d %H:%M'))
+        game.LOGGER.addHandler(self.handler)
+
+    def tearDown(self):
+        game.LOGGER.removeHandler(self.handler)
+        self.handler.close()
+        super().tearDown()
+
+    def test_restore_log(self):
+        self.game.restore(self.snapshot)
+        self.handler.flush()
+        with open(self.log_path, 'r') as f:
+            lines = f.read().splitlines()
+        assert lines == [
+            'Apr 23 21:47 - INFO - oppositeTheChamb - ["has_ring"] - '
+            '["#LEFT", "#RIGHT"]',
+            'Apr 23 21:47 - INFO - 669401']
+
+    def test_restore_cursor(self):
+        self.game.restore(self.snapshot)
+        cursor = self.game._load_cursor(669401)
+        assert cursor['since_id'] == 12
+        assert cursor['tally'] == Counter({'#LEFT': 2, '#RIGHT': 1})
+        assert self.story.flags == ['has_ring']
+
+    def test_restore_wrong_story(self):
+        self.snapshot.title = 'Another Story'
+        with self.assertRaises(ValueError):
+            self.game.restore(self.snapshot)
+
+    def test_restore_new_game(self):
+        with self.assertRaises(ValueError):
+            self.game.restore(snapshot.TWGBSnapshot(self.story.title))
+
+
+class TestTWGBGameFork(TestTWGBSnapshot):
+
+    def test_fork_runoff(self):
+        fork = self.game.fork(self.snapshot)
+        assert sorted(fork.get_hashtags()) == ['#LEFT', '#RIGHT']
+        with self.assertRaises(KeyError):
+            fork.advance('#FIRE')
+
+    def test_fork_tally(self):
+        fork = self.game.fork(self.snapshot)
+        fork.vote(['#right'])
+        fork.vote(['#right'])
+        thread = fork.advance()
+        expected = story.TWGBStory(GOOD_INPUTS)
+        expected.set_flags(['has_ring'])
+        assert thread == expected.get_section('youCrawlThroughT')
+        assert fork.flags == expected.flags
+        assert fork.bookmark == 'youCrawlThroughT'
+        assert not fork.tally
+
+    def test_fork_tie_prompt(self):
+        fork = self.game.fork(self.snapshot)
+        # The snapshot has #LEFT 2 and #RIGHT 1
+        fork.vote(['#right'])
+        thread = fork.advance()
+        assert thread[0].startswith('Should we:')
+        assert fork.bookmark == 'oppositeTheChamb'
+        assert fork.runoff == []
+        assert not fork.tally
+
+    def test_fork_tie_runoff(self):
+        fork = self.snapshot.fork(self.story, 'runoff')
+        # The snapshot has #LEFT 2 and #RIGHT 1
+        fork.vote(['#right'])
+        thread = fork.advance()
+        assert thread == self.story.render_options_prompt(
+            'oppositeTheChamb', ['#LEFT', '#RIGHT'], ['has_ring'])[0]
+        assert fork.bookmark == 'oppositeTheChamb'
+        assert fork.runoff == ['#LEFT', '#RIGHT']
+        assert fork.fork().tie_break == 'runoff'
+
+    def test_fork_tie_break_raises(self):
+        with self.assertRaises(ValueError):
+            self.snapshot.fork(self.story, 'coin')
+
+    def test_fork_independent(self):
+        left = self.snapshot.fork(self.story)
+        right = left.fork()
+        left.advance('#LEFT')
+        right.advance('#RIGHT')
+        assert left.threads != right.threads
+        assert self.story.flags == []
+        assert right.snapshot().bookmark == 'youCrawlThroughT'
+
+    def test_fork_to_ending(self):
+        fork = snapshot.TWGBSnapshot(self.story.title).fork(self.story)
+        fork.advance()
+        for choice in ['#RIGHT', '#CRATE', '#HOME', '#SMITHY']:
+            fork.advance(choice)
+        assert fork.ended
+        assert fork.threads[-1][-1].startswith('Thank you for playing')
+        with self.assertRaises(ValueError):
+            fork.advance('#LEFT')
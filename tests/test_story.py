@@ -1,7 +1,15 @@
 from unittest import TestCase
+from unittest import mock
 from twgamebook import story
+import bz2
+import gzip
+import io
 import json
 import logging
+import lzma
+import os
+import shutil
+import tempfile
 
 # Setup the logger for unittests to write to
 LOGGER = logging.getLogger('twgamebook')
@@ -317,3 +325,269 @@ class testTWGBStoryPrivate(TestTWGBStoryLocal):
         self.assertFalse(self.story._pass_conditions(['has_ring'],
                                                     ['gave_ring_away']))
 
+
+# Check public function reload against an edited copy of the story
+class TestTWGBStoryReload(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp_dir.name, 'story.json')
+        shutil.copy(GOOD_INPUTS, self.source)
+        self.story = story.TWGBStory(self.source)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def edit_source(self, edit):
+        with open(self.source, 'r') as f:
+            source_data = json.load(f)
+        edit(source_data['data']['stitches'])
+        with open(self.source, 'w') as f:
+            json.dump(source_data, f)
+        # Make sure the modification time moves on
+        stamp = os.stat(self.source).st_mtime + 1
+        os.utime(self.source, (stamp, stamp))
+
+    def test_reload_unchanged(self):
+        self.assertFalse(self.story.reload('oppositeTheChamb'))
+        assert self.story._source_stamp == os.stat(self.source).st_mtime
+        self.assertFalse(self.story.reload('oppositeTheChamb'))
+
+    def test_reload_touched(self):
+        stitches = self.story.stitches
+        self.edit_source(lambda x: None)
+        self.assertFalse(self.story.reload('oppositeTheChamb'))
+        assert self.story.stitches is stitches
+
+    def test_load_no_source_stamp(self):
+        # Loading an HTTP story never waits on a HEAD request
+        with open(GOOD_INPUTS, 'r') as f:
+            source_data = json.load(f)
+        with mock.patch('requests.head') as head:
+            story.TWGBStory('https://www.inklewriter.com/stories/1.json',
+                            source_data)
+        head.assert_not_called()
+
+    def test_reload_changed_stitch(self):
+        unchanged = self.story._get_stitch('oppositeTheChamb')
+        def edit(stitches):
+            stitches['aFireHadBeenLitH']['content'][0] = 'A fire burns here. '
+        self.edit_source(edit)
+        self.assertTrue(self.story.reload('oppositeTheChamb'))
+        assert self.story._get_stitch('aFireHadBeenLitH').content == \
+            'A fire burns here. '
+        assert self.story._get_stitch('oppositeTheChamb') is unchanged
+
+    def test_reload_bookmark_removed(self):
+        stitches = self.story.stitches
+        def edit(stitches):
+            del stitches['oppositeTheChamb']
+        self.edit_source(edit)
+        self.assertRaises(KeyError, self.story.reload, 'oppositeTheChamb')
+        assert self.story.stitches is stitches
+
+    def test_reload_flag_removed(self):
+        self.story.flags = ['has_ring']
+        stitches = self.story.stitches
+        def edit(stitches):
+            stitches['youPutTheRingInY']['content'].pop()
+        self.edit_source(edit)
+        self.assertRaises(ValueError, self.story.reload, 'oppositeTheChamb')
+        assert self.story.stitches is stitches
+
+# Check that rendering a section leaves the story alone until applied
+class TestTWGBStoryRenderSection(TestTWGBStoryLocal):
+
+    def test_render_section_no_flags(self):
+        self.story.render_section('youFindASovereig')
+        self.story.render_section('youPutTheRingInY')
+        assert self.story.flags == []
+
+    def test_render_section_flags(self):
+        section = self.story.render_section('youPutTheRingInY')
+        assert section[1] == ['has_ring']
+        assert section[2] == ['oppositeTheChamb - ["has_ring"]']
+
+    def test_apply_section(self):
+        section = self.story.render_section('youPutTheRingInY')
+        thread = self.story.apply_section(section)
+        assert thread == section[0]
+        assert self.story.flags == ['has_ring']
+
+    def test_render_section_raises(self):
+        self.assertRaises(KeyError, self.story.render_section, 'INVALIDKEY')
+
+    def loop_story(self, stitches):
+        return story.TWGBStory('<loop>', {
+            'title': 'Loop', 'data': {'editorData': {'authorName': 'Tests'},
+                                      'initial': 's0', 'stitches': stitches}})
+
+    def test_render_section_divert_loop(self):
+        my_story = self.loop_story({
+            's0': {'content': ['There', {'divert': 's1'}]},
+            's1': {'content': ['And back', {'divert': 's0'}]}})
+        self.assertRaises(ValueError, my_story.render_section, 's0')
+
+    def test_render_section_option_loop(self):
+        # A flag is set the first time round, then the one option left is
+        # followed round the loop
+        option = {'option': 'Again #AGAIN', 'linkPath': 's0',
+                  'ifConditions': None, 'notIfConditions': None}
+        hidden = {'option': 'Leave #LEAVE', 'linkPath': 's0',
+                  'ifConditions': [{'ifCondition': 'never'}],
+                  'notIfConditions': None}
+        my_story = self.loop_story({
+            's0': {'content': ['Round', {'divert': 's1'}]},
+            's1': {'content': ['Again', option, hidden,
+                               {'flagName': 'seen'}]}})
+        self.assertRaises(ValueError, my_story.render_section, 's0')
+
+# Check public function get_options_prompt
+class TestTWGBStoryGetOptionsPrompt(TestTWGBStoryLocal):
+
+    def test_get_options_prompt_runoff(self):
+        prompt = self.story.get_options_prompt('oppositeTheChamb',
+                                               ['#LEFT', '#RIGHT'])
+        assert prompt == ['Should we:\n\n* Go #Left\n* Go #Right\n\nReply to '
+                          'this tweet with your preferred Hashtag']
+
+    def test_get_options_prompt_log_written(self):
+        self.story.get_options_prompt('oppositeTheChamb', ['#LEFT', '#RIGHT'])
+        with open('twgamebook.log', 'r') as f:
+            logs = f.readlines()
+        info_logs = [x for x in logs if 'INFO' in x]
+        assert 'INFO - oppositeTheChamb - [] - ["#LEFT", "#RIGHT"]' in \
+            info_logs[-1]
+
+    def test_render_options_prompt_hidden_option(self):
+        # #FIRE is hidden with the ring, so there is no runoff to limit to
+        section = self.story.render_options_prompt(
+            'oppositeTheChamb', ['#FIRE', '#LEFT'], ['has_ring'])
+        assert section == (['Should we:\n\n* Go #Left\n* Go #Right\n\nReply '
+                            'to this tweet with your preferred Hashtag'], [],
+                           ['oppositeTheChamb - ["has_ring"]'])
+
+    def test_render_options_prompt_one_option(self):
+        section = self.story.render_options_prompt('youPushTheCrateA')
+        assert section == self.story.render_section('ohDearIHaveSomeB')
+
+    def test_get_options_prompt_raises(self):
+        self.assertRaises(KeyError, self.story.get_options_prompt,
+                          'INVALIDKEY')
+
+# Check compressed story sources
+class TestTWGBStoryCompressed(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        with open(GOOD_INPUTS, 'rb') as f:
+            self.raw = f.read()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def compressed_story(self, module, name):
+        path = os.path.join(self.tmp_dir.name, name)
+        with module.open(path, 'wb') as f:
+            f.write(self.raw)
+        return story.TWGBStory(path)
+
+    def test_gzip_source(self):
+        my_story = self.compressed_story(gzip, 'story.json.gz')
+        assert len(my_story.stitches) == 50
+
+    def test_bz2_source(self):
+        my_story = self.compressed_story(bz2, 'story.json.bz2')
+        assert len(my_story.stitches) == 50
+
+    def test_xz_source(self):
+        # Detected by the magic bytes rather than the file name
+        my_story = self.compressed_story(lzma, 'story.json')
+        assert len(my_story.stitches) == 50
+
+    def test_truncated_sources(self):
+        # Half written sources are a ValueError, as a missing file is
+        for module in (gzip, bz2, lzma):
+            path = os.path.join(self.tmp_dir.name, 'story.json')
+            with open(path, 'wb') as f:
+                f.write(module.compress(self.raw)[:200])
+            self.assertRaises(ValueError, story.TWGBStory, path)
+
+    def test_corrupt_source(self):
+        path = os.path.join(self.tmp_dir.name, 'story.json.gz')
+        with open(path, 'wb') as f:
+            f.write(gzip.compress(self.raw)[:10] + b'not deflate data' * 20)
+        self.assertRaises(ValueError, story.TWGBStory, path)
+
+    def test_open_decompressed_unbuffered(self):
+        # HTTP response bodies are plain unbuffered streams
+        raw = io.FileIO(os.path.join(self.tmp_dir.name, 'story'), 'w+b')
+        with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+            f.write(self.raw)
+        raw.seek(0)
+        assert story.open_decompressed(raw).read() == self.raw
+        raw.close()
+
+    def test_open_decompressed_plain(self):
+        stream = io.BufferedReader(io.BytesIO(self.raw))
+        assert story.open_decompressed(stream) is stream
+
+
+# Check stitch content is rendered to plain text when the story is loaded
+class TestTWGBStoryRenderContent(TestTWGBStoryLocal):
+
+    def test_render_content_markup(self):
+        assert story.render_content('A *-bold-* and /=quiet=/ step') == \
+            'A bold and quiet step'
+        assert story.render_content('*-/=Both=/-*') == 'Both'
+
+    def test_render_content_whitespace(self):
+        assert story.render_content(' One.  Two.\t \n\n\n\nThree.  ') == \
+            'One. Two.\n\nThree.'
+
+    def test_stitch_text(self):
+        stitch = self.story._get_stitch('aFireHadBeenLitH')
+        assert stitch.content == 'A fire had been lit here recently. '
+        assert stitch.text == 'A fire had been lit here recently.'
+        assert stitch.posts == [stitch.text]
+
+    def test_stitch_posts(self):
+        for stitch in self.story.stitches:
+            assert all(len(x) <= story.POST_LENGTH for x in stitch.posts)
+        assert len(self.story._get_stitch('ohDearIHaveSomeB').posts) == 2
+
+    def test_split_posts_paragraphs(self):
+        first = 'First paragraph here.'
+        second = ' '.join(['Second'] * 50) + '.'
+        posts = story.split_posts(f"{first}\n\n{second}\n\nThe end.")
+        assert posts[0] == first
+        assert '  ' not in ''.join(posts)
+        assert ' '.join(posts[1:]) == f"{second}\n\nThe end."
+        assert all(len(x) <= story.POST_LENGTH for x in posts)
+
+    def test_split_posts_prompt(self):
+        options = [{'option': f"Option number {x} goes somewhere far away "
+                              f"#OPT{x}", 'linkPath': 'aFireHadBeenLitH',
+                    'ifConditions': None, 'notIfConditions': None}
+                   for x in range(10)]
+        posts = self.story._get_options(options, [])
+        assert len(posts) > 1
+        assert posts[0].startswith('Should we:\n\n* Option number 0')
+        assert posts[-1].endswith(
+            'Reply to this tweet with your preferred Hashtag')
+        lines = [x for y in posts for x in y.split('\n')]
+        for option in options:
+            assert f"* {option['option']}" in lines
+        assert all(len(x) <= story.POST_LENGTH for x in posts)
+
+    def test_render_section_posts(self):
+        stitch = self.story._get_stitch('ohDearIHaveSomeB')
+        thread, new_flags, log_messages = self.story.render_section(
+            'ohDearIHaveSomeB', [])
+        assert thread[:2] == stitch.posts
+        assert all(len(x) <= story.POST_LENGTH for x in thread)
+
+    def test_get_section_text(self):
+        section = self.story.get_section()
+        assert all(x == x.strip() for x in section)
+        assert '  ' not in ''.join(section)
@@ -0,0 +1,302 @@
+from array import array
+
+from twgamebook.game import LOGGER
+from twgamebook.story import render_prompt
+
+
+class TWGBAnalytics(object):
+    """An object for working out the shape of a story without playing
+    through every path
+
+    The stitches are numbered and their diverts and option linkPaths are held
+    as a compressed adjacency list in flat arrays. Loops are condensed into
+    strongly connected components, and the statistics are worked out with
+    dynamic programming over the resulting acyclic graph, so everything runs
+    in time linear in the number of stitches and options. Conditions on
+    stitches and options are ignored, so every option is treated as
+    available.
+
+    :param story: The story to analyse
+    :type story: twgamebook.story.TWGBStory
+
+    :cvar list keys: The stitch keys, by stitch number
+    :cvar dict index: The stitch number for each stitch key
+    :cvar array offsets: Where each stitch's edges start in targets, with a
+        final entry for the end of the last stitch's edges
+    :cvar array targets: The stitch number each edge leads to
+    :cvar array diverts: The stitch number each stitch diverts to, or -1
+    :cvar array components: The strongly connected component of each stitch
+    :cvar int component_count: The number of strongly connected components
+    """
+
+    def __init__(self, story):
+        """Object init"""
+        self.story = story
+        self.keys = [x.key for x in story.stitches]
+        self.index = {x: i for i, x in enumerate(self.keys)}
+        self.offsets = array('l', [0])
+        self.targets = array('l')
+        self.diverts = array('l')
+        for stitch in story.stitches:
+            divert = self._lookup(stitch.key, stitch.divert)
+            self.diverts.append(divert)
+            # get_section always follows a divert over any options
+            if divert >= 0:
+                self.targets.append(divert)
+            else:
+                for option in stitch.options:
+                    target = self._lookup(stitch.key, option['linkPath'])
+                    if target >= 0:
+                        self.targets.append(target)
+            self.offsets.append(len(self.targets))
+        self.components, self.component_count = self._condense()
+
+    def _lookup(self, key, link):
+        """Get the stitch number for a divert or linkPath
+
+        :param key: The key of the stitch holding the link
+        :type key: str
+        :param link: The stitch key being linked to
+        :type link: str
+        :return: The stitch number, or -1 if there is no link or the linked
+            stitch is missing from the story
+        :rtype: int
+        """
+        if not link:
+            return -1
+        if link not in self.index:
+            LOGGER.warning(f"{key} links to missing stitch {link}")
+            return -1
+        return self.index[link]
+
+    def _condense(self):
+        """Find the strongly connected components with an iterative version of
+        Tarjan's algorithm
+
+        Components are numbered in reverse topological order, so every edge
+        between components leads to a lower numbered component.
+
+        :return: The component of each stitch and the number of components
+        :rtype: array, int
+        """
+        count = len(self.keys)
+        order = array('l', [-1] * count)
+        low = array('l', [0] * count)
+        components = array('l', [-1] * count)
+        on_stack = bytearray(count)
+        stack = []
+        component_count = 0
+        visited = 0
+        for root in range(count):
+            if order[root] >= 0:
+                continue
+            # Each frame is a stitch and the position of the next edge to try
+            work = [(root, self.offsets[root])]
+            order[root] = low[root] = visited
+            visited += 1
+            stack.append(root)
+            on_stack[root] = 1
+            while work:
+                node, edge = work[-1]
+                if edge < self.offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    target = self.targets[edge]
+                    if order[target] < 0:
+                        order[target] = low[target] = visited
+                        visited += 1
+                        stack.append(target)
+                        on_stack[target] = 1
+                        work.append((target, self.offsets[target]))
+                    elif on_stack[target] and order[target] < low[node]:
+                        low[node] = order[target]
+                    continue
+                work.pop()
+                if work and low[node] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[node]
+                if low[node] == order[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        components[member] = component_count
+                        if member == node:
+                            break
+                    component_count += 1
+        return components, component_count
+
+    def endings(self):
+        """Get the stitches that end the story
+
+        :return: The keys of stitches with no divert and no options
+        :rtype: list
+        """
+        return [self.keys[x] for x in range(len(self.keys)) if
+                self.offsets[x] == self.offsets[x + 1] and
+                not self.story.stitches[x].options]
+
+    def path_counts(self, start_key=''):
+        """Count the distinct paths from a stitch to each ending
+
+        Each loop in the story is counted as a single step, otherwise any
+        story with a way back would have endless paths.
+
+        :param start_key: The stitch to count paths from, defaults to the
+            start of the story
+        :type start_key: str
+        :return: The number of paths to each ending key
+        :rtype: dict
+        """
+        start = self.index[start_key or self.story.initial]
+        counts = [0] * self.component_count
+        counts[self.components[start]] = 1
+        members = self._component_members()
+        # Highest numbered components come first in topological order
+        for component in range(self.component_count - 1, -1, -1):
+            if not counts[component]:
+                continue
+            for node in members[component]:
+                for edge in range(self.offsets[node], self.offsets[node + 1]):
+                    target = self.components[self.targets[edge]]
+                    if target != component:
+                        counts[target] += counts[component]
+        return {x: counts[self.components[self.index[x]]] for x in
+                self.endings()}
+
+    def _component_members(self):
+        """Group the stitch numbers by component
+
+        :return: The stitch numbers in each component
+        :rtype: list
+        """
+        members = [[] for x in range(self.component_count)]
+        for node in range(len(self.keys)):
+            members[self.components[node]].append(node)
+        return members
+
+    def divert_chains(self):
+        """Count the diverts followed from each stitch before reaching a
+        stitch without one
+
+        :return: The chain length for each stitch number, or -1 if the
+            diverts loop forever
+        :rtype: array
+        """
+        count = len(self.keys)
+        chains = array('l', [-2] * count)
+        for root in range(count):
+            path = []
+            node = root
+            # -2 not yet seen, -3 on the current path
+            while node >= 0 and chains[node] == -2:
+                chains[node] = -3
+                path.append(node)
+                node = self.diverts[node]
+            if node < 0:
+                length = -1
+            elif chains[node] == -3 or chains[node] == -1:
+                length = None
+            else:
+                length = chains[node]
+            for node in reversed(path):
+                if length is None:
+                    chains[node] = -1
+                else:
+                    length += 1
+                    chains[node] = length
+        return chains
+
+    def longest_divert_chain(self):
+        """Find the longest run of diverts in the story
+
+        :return: The number of diverts in the chain and the stitch keys along
+            it, with 0 and [] if there are no diverts
+        :rtype: int, list
+        """
+        chains = self.divert_chains()
+        longest = max(range(len(self.keys)), key=lambda x: chains[x],
+                      default=-1)
+        if longest < 0 or chains[longest] <= 0:
+            return 0, []
+        ret_list = [self.keys[longest]]
+        node = longest
+        while self.diverts[node] >= 0:
+            node = self.diverts[node]
+            ret_list.append(self.keys[node])
+        return chains[longest], ret_list
+
+    def thread_lengths(self):
+        """Work out how many posts follow each decision
+
+        A section posts each stitch down its divert chain, split into posts
+        as the stitch already is, then either the options or the ending
+        message. Sections whose diverts loop forever are left out.
+
+        :return: For each stitch with options, the expected posts over its
+            options if each is equally likely, and the most posts
+        :rtype: dict
+        """
+        chain_posts = self.chain_posts()
+        ret_dict = {}
+        for node, stitch in enumerate(self.story.stitches):
+            if not stitch.options or self.diverts[node] >= 0:
+                continue
+            posts = [chain_posts[self.index[x['linkPath']]] for x in
+                     stitch.options if x['linkPath'] in self.index and
+                     chain_posts[self.index[x['linkPath']]] >= 0]
+            if posts:
+                ret_dict[stitch.key] = (sum(posts) / len(posts), max(posts))
+        return ret_dict
+
+    def chain_posts(self):
+        """Count the posts in the section starting at each stitch, the posts
+        of every stitch down its divert chain and then the options prompt,
+        with every option included, or the ending message
+
+        :return: The posts for each stitch number, or -1 if the diverts loop
+            forever
+        :rtype: array
+        """
+        chains = self.divert_chains()
+        posts = array('l', [-1] * len(self.keys))
+        for root in range(len(self.keys)):
+            if chains[root] < 0:
+                continue
+            path = []
+            node = root
+            while node >= 0 and posts[node] == -1:
+                path.append(node)
+                node = self.diverts[node]
+            if node >= 0:
+                # The rest of the section has already been counted
+                total = posts[node]
+            else:
+                # The options prompt, or the ending message
+                last = self.story.stitches[path[-1]]
+                total = len(render_prompt(last.options)) if last.options \
+                    else 1
+            for node in reversed(path):
+                total += len(self.story.stitches[node].posts)
+                posts[node] = total
+        return posts
+
+    def summary(self):
+        """Get the headline statistics for the story
+
+        :return: Counts of stitches, options, components and endings, the
+            paths to each ending, the expected and maximum posts per decision
+            and the longest divert chain
+        :rtype: dict
+        """
+        thread_lengths = self.thread_lengths()
+        expected = [x[0] for x in thread_lengths.values()]
+        chain_length, chain = self.longest_divert_chain()
+        return {'stitches': len(self.keys),
+                'edges': len(self.targets),
+                'components': self.component_count,
+                'endings': len(self.endings()),
+                'path_counts': self.path_counts(),
+                'expected_posts': sum(expected) / len(expected) if expected
+                else 0,
+                'max_posts': max([x[1] for x in thread_lengths.values()],
+                                 default=0),
+                'longest_divert_chain': chain_length,
+                'longest_divert_chain_keys': chain}
@@ -1,6 +1,9 @@
 """
 Usage:
-    runtwgb -s SOURCE -t PERIOD [-n] [-d] [-f OPTION]
+    runtwgb -s SOURCE -t PERIOD [-n] [-d] [-r] [-f OPTION] [-m FILE] [-p FILE]
+            [--log-size=SIZE | --log-period=PERIOD] [--log-backups=COUNT]
+            [--tie-break=MODE] [-a COUNT] [--server=SOCKET]
+            [--snapshot=FILE | --restore=FILE]
 
 Options:
 -s SOURCE --source=SOURCE       Source file for the game, can be a local
@@ -8,44 +11,168 @@ Options:
 -t PERIOD --sleep-time=PERIOD   Period to sleep between threads in the game
                                 for example 24h, 3d, 1h
 
+--server=SOCKET                 Get story sections from a runtwgbd server on
+                                SOCKET, where SOURCE is the story's title or
+                                source on that server
 -n --no-twitter                 Use interactive console session for testing
 -d                              Switch debugging on in the log
+--log-size=SIZE                 Rotate the log when it reaches SIZE, for
+                                example 500K, 10M
+--log-period=PERIOD             Rotate the log every PERIOD, for example 1d,
+                                12h
+--log-backups=COUNT             Number of rotated log segments to keep. Rotated
+                                segments only keep the game state records
+                                [default: 100]
+-r --reload                     Reload the story from SOURCE before each
+                                decision if it has been edited
 -f --force-option=OPTION        Force a particular hashtag to be used on the
                                 next decision
+--tie-break=MODE                On a tied vote, post the options again with
+                                'prompt' or only the tied options with
+                                'runoff' [default: prompt]
+-a --audience=COUNT             Close the vote early once COUNT replies are
+                                counted, or once the replies still to come
+                                could not change the winner
+-m --metrics=FILE               Write game loop timings to FILE after each
+                                thread, in Prometheus text format if FILE
+                                ends with .prom, otherwise as JSON lines
+-p --profile=FILE               Profile the game with cProfile and
+                                tracemalloc, writing the top functions and
+                                allocation sites for each thread to FILE
+--snapshot=FILE                 Save a snapshot of the game state to FILE
+                                and exit without playing
+--restore=FILE                  Restore the game state from a snapshot in
+                                FILE before playing
 """
 import logging
-from docopt import docopt
-from twgamebook import game, story
 
-# Set my logging options
+# Get the log into this namespace, handlers are only attached once main()
+# runs so that importing this module stays cheap
 LOGGER = logging.getLogger('twgamebook')
-LOGGER.setLevel(logging.INFO)
-_LOG_FH = logging.FileHandler('twgamebook.log')
-_LOG_FH.setLevel(logging.INFO)
-_log_format = logging.Formatter('%(asctime)s - %(levelname)s - %(''message)s',
-                                datefmt='%b %d %H:%M')
-_LOG_FH.setFormatter(_log_format)
-LOGGER.addHandler(_LOG_FH)
+
+
+def _setup_logging(debug=False, log_size='', log_period='', log_backups=100):
+    """Attach the game log file handler to the twgamebook logger
+
+    If the log is rotated, each rotated segment is compacted down to the
+    INFO records holding the game state.
+
+    :param debug: Switch debugging on in the log
+    :type debug: bool
+    :param log_size: Size to rotate the log at, e.g. 500K, 10M
+    :type log_size: str
+    :param log_period: Period to rotate the log after, e.g. 1d, 12h
+    :type log_period: str
+    :param log_backups: The number of rotated log segments to keep
+    :type log_backups: int
+    :return: The file handler attached to the logger
+    :rtype: logging.FileHandler
+    """
+    level = logging.DEBUG if debug else logging.INFO
+    LOGGER.setLevel(level)
+    if log_size or log_period:
+        from logging import handlers
+        from twgamebook.logs import compacting_rotator
+        if log_size:
+            log_fh = handlers.RotatingFileHandler(
+                'twgamebook.log', maxBytes=_parse_size(log_size),
+                backupCount=log_backups)
+        else:
+            if log_period[-1] not in 'dhm':
+                raise ValueError("Log period expects 'd' 'h' or 'm'")
+            log_fh = handlers.TimedRotatingFileHandler(
+                'twgamebook.log', when=log_period[-1].upper(),
+                interval=int(log_period[:-1]), backupCount=log_backups)
+        log_fh.rotator = compacting_rotator
+    else:
+        log_fh = logging.FileHandler('twgamebook.log')
+    log_fh.setLevel(level)
+    log_format = logging.Formatter('%(asctime)s - %(levelname)s - %('
+                                   'message)s', datefmt='%b %d %H:%M')
+    log_fh.setFormatter(log_format)
+    LOGGER.addHandler(log_fh)
+    return log_fh
+
+
+def _parse_size(size):
+    """Convert a size such as 500K or 10M to bytes
+
+    :param size: The size, with an optional K, M or G suffix
+    :type size: str
+    :return: The size in bytes
+    :rtype: int
+    """
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if size[-1].upper() in units:
+        return int(size[:-1]) * units[size[-1].upper()]
+    else:
+        return int(size)
+
 
 def main():
+    # Only pull in the heavier modules once we know we're running
+    from docopt import docopt
+    from twgamebook import game, story
     args = docopt(__doc__)
-    if args['-d']:
-        LOGGER.setLevel(logging.DEBUG)
-        _LOG_FH.setLevel(logging.DEBUG)
+    _setup_logging(args['-d'], args['--log-size'], args['--log-period'],
+                   int(args['--log-backups']))
     LOGGER.debug('Starting twgamebook')
     # Load the game
     source_file = args['--source']
     sleep_time = args['--sleep-time']
-    my_story = story.TWGBStory(source_file)
+    audience = int(args['--audience'] or 0)
+    profiler = None
+    if args['--server']:
+        from twgamebook.server import TWGBStoryClient
+        load_story = lambda x: TWGBStoryClient(args['--server'], x)
+    else:
+        load_story = story.TWGBStory
+    if args['--metrics'] or args['--profile']:
+        from twgamebook.metrics import TWGBMetrics, get_sink
+        sinks = []
+        if args['--metrics']:
+            sinks.append(get_sink(args['--metrics']))
+        if args['--profile']:
+            from twgamebook.profiling import TWGBProfiler
+            profiler = TWGBProfiler(args['--profile'])
+            sinks.append(profiler)
+        metrics = TWGBMetrics(sinks)
+        with metrics.timer('story_load'):
+            my_story = load_story(source_file)
+    else:
+        metrics = None
+        my_story = load_story(source_file)
     if args['--no-twitter']:
-        my_game = game.TWGBConsoleGame(my_story, sleep_time)
+        my_game = game.TWGBConsoleGame(my_story, sleep_time,
+                                       reload=args['--reload'],
+                                       metrics=metrics,
+                                       tie_break=args['--tie-break'],
+                                       audience=audience)
     else:
-        my_game = game.TWGBGame(my_story, sleep_time)
+        my_game = game.TWGBGame(my_story, sleep_time, reload=args['--reload'],
+                                metrics=metrics,
+                                tie_break=args['--tie-break'],
+                                audience=audience)
+    if args['--snapshot']:
+        with open(args['--snapshot'], 'wb') as f:
+            f.write(my_game.snapshot().to_bytes())
+        return
+    if args['--restore']:
+        from twgamebook.snapshot import TWGBSnapshot
+        with open(args['--restore'], 'rb') as f:
+            my_game.restore(TWGBSnapshot.from_bytes(f.read()))
     if args['--force-option']:
         force_htag = args['--force-option']
     else:
         force_htag = ''
-    my_game.play(force_htag=force_htag)
+    if profiler:
+        profiler.start()
+        try:
+            my_game.play(force_htag=force_htag)
+        finally:
+            profiler.stop()
+    else:
+        my_game.play(force_htag=force_htag)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,345 @@
+"""
+Usage:
+    runtwgbdiff [-b BOOKS] [-k STITCHES] [-f FLAGS] [-r SEED]
+
+Options:
+-b BOOKS --books=BOOKS          Number of random books [default: 50]
+-k STITCHES --stitches=STITCHES Stitches in each book [default: 40]
+-f FLAGS --flag-states=FLAGS    Random flag states to try from every
+                                stitch [default: 4]
+-r SEED --seed=SEED             Seed for the random books [default: 0]
+
+Check that the story engine renders random books exactly as the reference
+engine does, and compare how fast they are.
+"""
+import json
+import logging
+import re
+from random import Random
+from time import perf_counter
+
+from twgamebook.game import LOGGER
+from twgamebook.story import TWGBStitch, TWGBStory, split_posts
+
+# Words for the random books, with trailing spaces as inklewriter leaves them
+_WORDS = ['cave', 'fire', 'ring', 'tunnel', 'crate', 'smithy', 'guard',
+          'door', 'key', 'map', 'lamp', 'river']
+_PUNCTUATION = ['.', '.  ', '! ', '?', ". '", ',']
+
+
+class TWGBReferenceStory(TWGBStory):
+    """The story engine as first written, kept as the reference that
+    optimised engines are checked against
+
+    get_section walks the story recursively, adding flags to the story and
+    writing the game state to the log as it goes. Stitches are posted as
+    the posts split from their plain text when the story is loaded.
+    """
+
+    def _get_options(self, options):
+        """Generate the section endings when options are present on the
+        stitch, as first written"""
+        filtered_options = []
+        for option in options:
+            if option['ifConditions']:
+                if_conditions = [x['ifCondition'] for x in
+                                 option['ifConditions']]
+            else:
+                if_conditions = []
+            if option['notIfConditions']:
+                not_if_conditions = [x['notIfCondition'] for x in option[
+                    'notIfConditions']]
+            else:
+                not_if_conditions = []
+            if self._pass_conditions(if_conditions, not_if_conditions):
+                filtered_options.append(option)
+        if len(filtered_options) == 1:
+            next_key = filtered_options[0]['linkPath']
+            return self._get_stitch(next_key)
+        else:
+            ret_str = 'Should we:\n\n'
+            for option in filtered_options:
+                ret_str += f"* {option['option']}\n"
+            ret_str += '\nReply to this tweet with your preferred Hashtag'
+            return split_posts(ret_str)
+
+    def _pass_conditions(self, if_conditions=[], not_if_conditions=[]):
+        """Check the conditions related to displaying the option or stitch,
+        as first written"""
+        if_result = True
+        not_if_result = True
+        if if_conditions:
+            if_result = all(item in self.flags for item in if_conditions)
+        if not_if_conditions:
+            not_if_result = any(item not in self.flags for item in
+                                not_if_conditions)
+        return if_result and not_if_result
+
+    def get_section(self, start_key='', _ret_list=[]):
+        """Read a section of the game until options or an ending is found,
+        as first written"""
+        if not _ret_list or not isinstance(_ret_list, list):
+            _ret_list = []
+        if not start_key or not isinstance(start_key, str):
+            start_key = self.initial
+        stitch = self._get_stitch(start_key)
+        if stitch:
+            self.flags += stitch.flag_names
+            if self._pass_conditions(stitch.if_conditions,
+                                     stitch.not_if_conditions):
+                _ret_list += stitch.posts
+            if stitch.divert:
+                return self.get_section(stitch.divert, _ret_list)
+            elif stitch.options:
+                LOGGER.info(f"{stitch.key} - {json.dumps(self.flags)}")
+                option_tweets = self._get_options(stitch.options)
+                if isinstance(option_tweets, TWGBStitch):
+                    return self.get_section(option_tweets.key, _ret_list)
+                else:
+                    _ret_list += option_tweets
+                    return _ret_list
+            else:
+                LOGGER.info(f"GAMEEND {self.title}")
+                _ret_list += split_posts(f"Thank you for playing "
+                                         f"{self.title} by {self.author}")
+                return _ret_list
+        else:
+            LOGGER.warning(f"Could not find {start_key} in the game")
+            raise KeyError(f"Could not find {start_key} in the game")
+
+    def get_hashtags(self, key):
+        """Get the hashtags associated with the options, as first written"""
+        if isinstance(key, str):
+            stitch = self._get_stitch(key)
+            if stitch:
+                ret_dict = {}
+                pattern = re.compile('#[0-9a-zA-Z]+')
+                for option in stitch.options:
+                    hash_tags = pattern.findall(option['option'])
+                    stitch_key = option['linkPath']
+                    if len(hash_tags) == 1:
+                        ret_dict[hash_tags[0].upper()] = stitch_key
+                    else:
+                        raise ValueError('Expected to find 1 hashtag')
+                return ret_dict
+            else:
+                raise KeyError(f"Could not find {key} in the game")
+        else:
+            raise KeyError('string expected as key')
+
+
+def random_book(rng, stitch_count=40, flag_count=5):
+    """Generate a random inklewriter book
+
+    Diverts only lead further into the book. Options lead anywhere only when
+    a stitch has two or more options without conditions, so no section can
+    walk round a loop forever.
+
+    :param rng: The random number generator to use
+    :type rng: random.Random
+    :param stitch_count: The number of stitches in the book
+    :type stitch_count: int
+    :param flag_count: The number of different flags in the book
+    :type flag_count: int
+    :return: The inklewriter JSON object
+    :rtype: dict
+    """
+    keys = [f"stitch{x}" for x in range(stitch_count)]
+    flag_names = [f"flag_{x}" for x in range(flag_count)]
+    stitches = {}
+    for number, key in enumerate(keys):
+        content = [_random_text(rng)]
+        later = keys[number + 1:]
+        kind = rng.random()
+        if not later or kind < 0.1:
+            pass
+        elif kind < 0.45:
+            content.append({'divert': rng.choice(later)})
+        else:
+            conditional = rng.random() < 0.5
+            option_count = rng.randint(1, 4)
+            for x in range(option_count):
+                if conditional or option_count < 2:
+                    link = rng.choice(later)
+                else:
+                    link = rng.choice(keys)
+                content.append({
+                    'option': _random_option(rng), 'linkPath': link,
+                    'ifConditions': _random_conditions(
+                        rng, conditional, flag_names, 'ifCondition'),
+                    'notIfConditions': _random_conditions(
+                        rng, conditional, flag_names, 'notIfCondition')})
+        if rng.random() < 0.3:
+            content.append({'flagName': rng.choice(flag_names)})
+        if rng.random() < 0.15:
+            content.append({'ifCondition': rng.choice(flag_names)})
+        if rng.random() < 0.15:
+            content.append({'notIfCondition': rng.choice(flag_names)})
+        stitches[key] = {'content': content}
+    return {'title': f"Random Book {rng.randint(0, 10 ** 6)}",
+            'data': {'editorData': {'authorName': 'Fuzz'},
+                     'initial': keys[0], 'stitches': stitches}}
+
+
+def _random_text(rng):
+    """Generate a paragraph of random words"""
+    return ' '.join(rng.choice(_WORDS) for x in range(rng.randint(1, 12))) + \
+        rng.choice(_PUNCTUATION)
+
+
+def _random_option(rng):
+    """Generate random option text, usually with a single hashtag"""
+    words = [rng.choice(_WORDS) for x in range(rng.randint(1, 4))]
+    chance = rng.random()
+    if chance < 0.95:
+        words[rng.randrange(len(words))] = f"#{rng.choice(_WORDS)}"
+    elif chance < 0.975:
+        words += [f"#{rng.choice(_WORDS)}", f"#{rng.choice(_WORDS)}"]
+    return ' '.join(words)
+
+
+def _random_conditions(rng, conditional, flag_names, name):
+    """Generate random option conditions, None or a list as inklewriter
+    does"""
+    if not conditional or rng.random() < 0.5:
+        return None
+    return [{name: rng.choice(flag_names)} for x in range(rng.randint(1, 2))]
+
+
+class _TWGBInfoCapture(logging.Handler):
+    """Keep the INFO messages written to the log, the game state records"""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.messages = []
+
+    def emit(self, record):
+        if record.levelno == logging.INFO:
+            self.messages.append(record.getMessage())
+
+
+def _run_case(story, key, flags, capture):
+    """Render a section with an engine and capture everything it changed
+
+    :return: The section or error, the story flags afterwards, the game
+        state written to the log and the hashtags or error
+    :rtype: tuple
+    """
+    story.set_flags(list(flags))
+    del capture.messages[:]
+    try:
+        section = story.get_section(key)
+    except Exception as e:
+        section = (type(e).__name__, str(e))
+    try:
+        hashtags = story.get_hashtags(key)
+    except Exception as e:
+        hashtags = (type(e).__name__, str(e))
+    return section, list(story.flags), list(capture.messages), hashtags
+
+
+def compare_engines(books=50, stitch_count=40, flag_states=4, seed=0,
+                    reference=TWGBReferenceStory, candidate=TWGBStory):
+    """Render every stitch of random books, with random flags, in both
+    engines and check that they match exactly
+
+    :param books: The number of random books
+    :type books: int
+    :param stitch_count: The number of stitches in each book
+    :type stitch_count: int
+    :param flag_states: The random flag states to try from each stitch
+    :type flag_states: int
+    :param seed: Seed for the random books
+    :type seed: int
+    :param reference: The reference engine class
+    :type reference: type
+    :param candidate: The engine class being checked
+    :type candidate: type
+    :return: The number of cases, the mismatches found, and the sections
+        per second from each engine
+    :rtype: dict
+    """
+    rng = Random(seed)
+    capture = _TWGBInfoCapture()
+    # Both engines write game state for the random books to the log, which
+    # must never reach a real game log where it could be resumed from
+    old_handlers = list(LOGGER.handlers)
+    old_level = LOGGER.level
+    old_propagate = LOGGER.propagate
+    for handler in old_handlers:
+        LOGGER.removeHandler(handler)
+    LOGGER.addHandler(capture)
+    LOGGER.setLevel(logging.INFO)
+    LOGGER.propagate = False
+    cases = 0
+    mismatches = []
+    timings = {'reference': 0.0, 'candidate': 0.0}
+    try:
+        for book in range(books):
+            source_data = random_book(rng, stitch_count)
+            flag_names = sorted({x['flagName'] for y in source_data['data'][
+                'stitches'].values() for x in y['content'] if
+                isinstance(x, dict) and 'flagName' in x})
+            engines = {'reference': reference(f"<book {book}>", source_data),
+                       'candidate': candidate(f"<book {book}>", source_data)}
+            for key in list(source_data['data']['stitches']) + ['', 'NOKEY']:
+                for x in range(flag_states):
+                    flags = [y for y in flag_names if rng.random() < 0.5]
+                    results = {}
+                    for name, story in engines.items():
+                        start = perf_counter()
+                        results[name] = _run_case(story, key, flags, capture)
+                        timings[name] += perf_counter() - start
+                    cases += 1
+                    if results['reference'] != results['candidate']:
+                        mismatches.append({
+                            'book': book, 'key': key, 'flags': flags,
+                            'reference': results['reference'],
+                            'candidate': results['candidate']})
+    finally:
+        LOGGER.removeHandler(capture)
+        for handler in old_handlers:
+            LOGGER.addHandler(handler)
+        LOGGER.setLevel(old_level)
+        LOGGER.propagate = old_propagate
+    return {'cases': cases, 'mismatches': mismatches,
+            'reference_per_second': cases / timings['reference'] if
+            timings['reference'] else 0,
+            'candidate_per_second': cases / timings['candidate'] if
+            timings['candidate'] else 0}
+
+
+def format_report(report):
+    """Format a comparison report for the console
+
+    :param report: The report from compare_engines
+    :type report: dict
+    :return: The report text
+    :rtype: str
+    """
+    lines = [f"Cases: {report['cases']}  Mismatches: "
+             f"{len(report['mismatches'])}",
+             f"Reference: {report['reference_per_second']:.0f} sections/sec  "
+             f"Candidate: {report['candidate_per_second']:.0f} sections/sec"]
+    for mismatch in report['mismatches'][:5]:
+        lines.append(f"Book {mismatch['book']} from {mismatch['key']!r} with "
+                     f"{mismatch['flags']}:\n"
+                     f"  reference {mismatch['reference']}\n"
+                     f"  candidate {mismatch['candidate']}")
+    return '\n'.join(lines)
+
+
+def main():
+    from docopt import docopt
+    args = docopt(__doc__)
+    report = compare_engines(books=int(args['--books']),
+                             stitch_count=int(args['--stitches']),
+                             flag_states=int(args['--flag-states']),
+                             seed=int(args['--seed']))
+    print(format_report(report))
+    if report['mismatches']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
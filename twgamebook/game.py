@@ -1,11 +1,14 @@
 import logging
 import json
-from textwrap import wrap
+import os
 import re
 from datetime import datetime, timedelta
 from random import randint
+from time import sleep
 from collections import Counter
 
+from twgamebook.logs import last_info_lines
+
 # Get the log into this namespace
 LOGGER = logging.getLogger('twgamebook')
 
@@ -17,10 +20,45 @@ class TWGBGame(object):
     :type story: twgamebook.story.TWGBStory
     :param sleep_time: Time to sleep between threads
     :type sleep_time: str
+    :param reload: Reload the story from its source before each decision if
+        it has been edited
+    :type reload: bool
+    :param metrics: Collect timers and counters for the game loop
+    :type metrics: twgamebook.metrics.TWGBMetrics
+    :param speculate: Render the section for every option in the background
+        while the vote is open, so the winning thread is ready to post
+    :type speculate: bool
+    :param tie_break: What to post when the vote is tied, 'prompt' posts the
+        options again, 'runoff' posts only the tied options and only counts
+        votes for those next time
+    :type tie_break: str
+    :param audience: The most replies expected to a vote. When set, the vote
+        closes early once this many replies are counted, or once the
+        remaining replies could no longer change the winner
+    :type audience: int
+
+    :cvar str cursor_file: The file the reply cursor is saved to
+    :cvar timedelta poll_time: How often to gather replies while the vote is
+        open
     """
-    def __init__(self, story, sleep_time):
+    def __init__(self, story, sleep_time, reload=False, metrics=None,
+                 speculate=True, tie_break='prompt', audience=0):
         """Initialise the game"""
+        if tie_break not in ('prompt', 'runoff'):
+            raise ValueError("Tie break expects 'prompt' or 'runoff'")
         self.story = story
+        self.tie_break = tie_break
+        self.audience = audience
+        self.cursor_file = 'twgamebook.cursor'
+        self.poll_time = timedelta(minutes=5)
+        self.reload = reload
+        self.metrics = metrics
+        self.speculate = speculate
+        self._executor = None
+        if metrics:
+            from twgamebook.metrics import GAME_METHODS, STORY_METHODS
+            metrics.instrument(self, GAME_METHODS)
+            metrics.instrument(self.story, STORY_METHODS)
         if sleep_time[-1] == 'd':
             self.sleep_time = timedelta(days=int(sleep_time[:-1]))
         elif sleep_time[-1] == 'h':
@@ -46,6 +84,8 @@ class TWGBGame(object):
             # Check the log, set the tweet_id to 0 until it's overwritten
             last_pos = self._load_last_log()
             tweet_id = 0
+            speculated = {}
+            thread = None
             if last_pos:
                 # Was it the end of the this game?
                 if f"GAMEEND {self.story.title}" in last_pos:
@@ -60,27 +100,177 @@ class TWGBGame(object):
                     LOGGER.debug(f"Got key {bookmark} and tweet {tweet_id} from "
                                  f"the log")
                     # Get the valid hashtags
-                    valid_hashtags = self.story.get_hashtags(bookmark)
+                    valid_hashtags = self._get_hashtags(bookmark, last_pos[4])
                     LOGGER.debug(f"Valid hashtags should be {valid_hashtags}")
+                    # Get every possible next section ready while we wait
+                    speculated = self._speculate(bookmark, valid_hashtags)
                     # Sleep for the required time and get the hashtags out of
                     # the replies
-                    user_hashtags = self._sleep_for_replies(tweet_id, last_time)
+                    user_hashtags = self._sleep_for_replies(tweet_id, last_time,
+                                                            valid_hashtags)
                     LOGGER.debug(f"Got user hashtags {user_hashtags}")
+                    # Pick up any edits made to the story while we slept
+                    if self.reload and self._reload_story(bookmark):
+                        valid_hashtags = self._get_hashtags(bookmark,
+                                                            last_pos[4])
+                        speculated = {}
                     votes_text, bookmark = self._check_votes(user_hashtags,
                                                    valid_hashtags)
-                    # If we've got a tie, return to the last paragraph from
-                    # the logs
-                    if bookmark == 'TIED':
-                        bookmark = last_pos[1]
                     if force_htag:
                         votes_text = '## Administrator Overruled ##'
                         bookmark = valid_hashtags[force_htag]
                         force_htag = ''
+                    # If we've got a tie, ask again from the last paragraph
+                    # in the logs without posting the whole section again
+                    if bookmark == 'TIED':
+                        bookmark = last_pos[1]
+                        thread = self._get_tie_prompt(bookmark, user_hashtags,
+                                                      valid_hashtags)
             if votes_text:
-                tweet_id = self._send_stitch(votes_text, tweet_id)
-            thread = self.story.get_section(bookmark)
+                from twgamebook.story import split_posts
+                tweet_id = self._send_story(split_posts(votes_text), tweet_id)
+            if thread is None:
+                thread = self._get_section(bookmark, speculated)
             post = self._send_story(thread, tweet_id)
             LOGGER.info(post)
+            if self.metrics:
+                self.metrics.count('turns')
+                self.metrics.flush()
+
+    def snapshot(self):
+        """Take a snapshot of the game state, from the log and the reply
+        cursor
+
+        :return: The snapshot
+        :rtype: twgamebook.snapshot.TWGBSnapshot
+        """
+        from twgamebook.snapshot import TWGBSnapshot
+        return TWGBSnapshot.from_game(self)
+
+    def restore(self, snapshot):
+        """Restore the game to a snapshot, carrying on from it the next time
+        the game is played
+
+        :param snapshot: The snapshot to restore
+        :type snapshot: twgamebook.snapshot.TWGBSnapshot
+        :raises ValueError: if the snapshot is of a different story, or of a
+            game that had not started
+        """
+        snapshot.restore(self)
+
+    def fork(self, snapshot=None):
+        """Start a lightweight copy of the game, sharing its story, which
+        can advance without changing the game
+
+        :param snapshot: The snapshot to start from, defaults to the current
+            game state
+        :type snapshot: twgamebook.snapshot.TWGBSnapshot
+        :return: The fork
+        :rtype: twgamebook.snapshot.TWGBGameFork
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        return snapshot.fork(self.story, self.tie_break)
+
+    def _get_hashtags(self, bookmark, runoff):
+        """Get the valid hashtags for the bookmark, limited to the runoff
+        hashtags if the last vote was tied
+
+        :param bookmark: The stitch key the game is waiting on
+        :type bookmark: str
+        :param runoff: The hashtags in a runoff, or an empty list
+        :type runoff: list
+        :return: Hashtags and their associated stitch keys
+        :rtype: dict
+        """
+        valid_hashtags = self.story.get_hashtags(bookmark)
+        if runoff:
+            valid_hashtags = {x: y for x, y in valid_hashtags.items() if x in
+                              runoff}
+        return valid_hashtags
+
+    def _get_tie_prompt(self, bookmark, user_hashtags, valid_hashtags):
+        """Get the options prompt to post again after a tied vote
+
+        :param bookmark: The stitch key the game is waiting on
+        :type bookmark: str
+        :param user_hashtags: The user submitted hashtags
+        :type user_hashtags: list
+        :param valid_hashtags: The valid hashtags for this part of the story
+        :type valid_hashtags: dict
+        :return: The options prompt as a single paragraph list, or the
+            section for the only option that can be followed
+        :rtype: list
+        """
+        if self.tie_break == 'runoff':
+            # The story leaves out any tied options hidden by their conditions
+            tally = Counter(x for x in user_hashtags if x in valid_hashtags)
+            top_votes = max(tally.values())
+            runoff = [x for x in valid_hashtags if tally[x] == top_votes]
+            LOGGER.debug(f"Runoff between {runoff}")
+            return self.story.get_options_prompt(bookmark, runoff)
+        else:
+            return self.story.get_options_prompt(bookmark)
+
+    def _speculate(self, bookmark, valid_hashtags):
+        """Start rendering the next section for every option in the
+        background
+
+        :param bookmark: The stitch key the game is waiting on
+        :type bookmark: str
+        :param valid_hashtags: The valid hashtags for this part of the story
+        :type valid_hashtags: dict
+        :return: The future for each rendered section by stitch key
+        :rtype: dict
+        """
+        if not self.speculate:
+            return {}
+        if not self._executor:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix='twgamebook-speculate')
+        flags = list(self.story.flags)
+        ret_dict = {}
+        for key in valid_hashtags.values():
+            if key not in ret_dict:
+                ret_dict[key] = self._executor.submit(
+                    self.story.render_section, key, flags)
+        return ret_dict
+
+    def _get_section(self, bookmark, speculated):
+        """Get the next section, using the speculatively rendered version if
+        there is one
+
+        :param bookmark: The key for the section's starting stitch
+        :type bookmark: str
+        :param speculated: The futures from _speculate
+        :type speculated: dict
+        :return: A list of paragraphs with the options as the final paragraph
+        :rtype: list
+        """
+        future = speculated.get(bookmark)
+        if future and not future.exception():
+            LOGGER.debug(f"Using speculatively rendered section {bookmark}")
+            return self.story.apply_section(future.result())
+        return self.story.get_section(bookmark)
+
+    def _reload_story(self, bookmark):
+        """Reload the story from its source, keeping the loaded story if the
+        edited version is no longer valid for the current game state, or the
+        source can not be reached
+
+        :param bookmark: The stitch key the game is waiting on
+        :type bookmark: str
+        :return: True if the story was reloaded
+        :rtype: bool
+        """
+        try:
+            return self.story.reload(bookmark)
+        # requests.RequestException is an OSError, so a source that is down
+        # for a while is caught here too
+        except (KeyError, ValueError, OSError) as e:
+            LOGGER.warning(f"Keeping the loaded story: {e}")
+            return False
 
     def _check_votes(self, user_hashtags, valid_hashtags):
         """Check that user submitted hashtags are valid and return a summary
@@ -125,23 +315,26 @@ class TWGBGame(object):
         twgamebook.game object with the last_tweet sent
             Apr 23 21:47 - INFO - 669401
 
+        After a tied vote with a runoff, the first message also has the
+        hashtags in the runoff
+            Apr 23 21:47 - INFO - oppositeTheChamb - [] - ["#LEFT", "#RIGHT"]
+
+        The log is read backwards from the end, carrying on into the rotated
+        log segments if the pair was split across a rotation.
+
         :return: (last_time(datetime), last_key(str), last_flags(list),
-            last_tweet(int)) or (game_end)
+            last_tweet(int), runoff(list)) or (game_end)
         :rtype: tuple
         """
-        # Read the log file in, the extract all the 'INFO' messages from it
-        with open('twgamebook.log', 'r') as log_file:
-            logs = log_file.readlines()
-        info_logs = [x for x in logs if 'INFO' in x]
+        # Get the last 2 'INFO' messages from the log
+        info_logs = last_info_lines('twgamebook.log', 2)
         # If there's no log we start fresh because there should be at least 2
         # messages per twitter stitch.
         if len(info_logs) >= 2:
-            # Trim the newline character and split out the fields
+            # Split out the fields
             # INFO messages should be in pairs of game info, tweet info
-            last_game_log = info_logs[-2][:-1]
-            last_game_log = last_game_log.split(' - ')
-            last_tweet = info_logs[-1][:-1]
-            last_tweet = last_tweet.split(' - ')[2]
+            last_game_log = info_logs[-2].split(' - ')
+            last_tweet = info_logs[-1].split(' - ')[2]
             # Because the year is not in the log, this will come up as 1900
             last_time = datetime.strptime(last_game_log[0], '%b %d %H:%M')
             last_time = last_time.replace(datetime.now().year)
@@ -151,7 +344,12 @@ class TWGBGame(object):
             # Otherwise we pickup where we left off
             else:
                 last_flags = json.loads(last_game_log[3])
-                return (last_time, last_game_key, last_flags, last_tweet)
+                if len(last_game_log) > 4:
+                    runoff = json.loads(last_game_log[4])
+                else:
+                    runoff = []
+                return (last_time, last_game_key, last_flags, last_tweet,
+                        runoff)
         else:
             return ()
 
@@ -182,48 +380,142 @@ class TWGBGame(object):
         """
         pass
 
-    def _sleep_for_replies(self, tweet_id, last_time):
+    def _sleep_for_replies(self, tweet_id, last_time, valid_hashtags=None):
         """Sleep for the required time between posts and gather replies to
         the last tweet
 
+        Replies are gathered as they arrive and the reply cursor, the last
+        reply ID seen and the tally so far, is saved after each batch. After
+        a restart only replies newer than the cursor are fetched and no reply
+        is counted twice. If an audience is set the sleep ends early once the
+        vote is decided.
+
         :param tweet_id: The last tweet_id to gather replies from
         :type tweet_id: int
         :param last_time: The last time a tweet was sent
         :type last_time: datetime
-        :return: A list of replies for now :TODO Work out the separation
-            between console and twitter
+        :param valid_hashtags: The valid hashtags for this part of the story,
+            needed to close the vote early
+        :type valid_hashtags: dict
+        :return: The hashtags from the replies, once per reply they were in
         :rtype: list
         """
+        cursor = self._load_cursor(tweet_id)
         # we want the loop to run at least once so we capture a reply
-        ret_list  = []
-        time_diff = timedelta()
-        while time_diff < self.sleep_time:
+        while True:
             # Now we check the difference between then and now
             time_diff = datetime.now() - last_time
-            # console will want to gather replies during the sleep, twitter
-            # will return None
-            reply = self._get_console_replies()
-            if reply:
-                ret_list += reply
-        # The console should have built a ret_list, otherwise get them from
-        # twitter
-        if not ret_list:
-            ret_list = self.get_twitter_replies(tweet_id)
-        return ret_list
+            replies = self._get_replies(tweet_id, cursor['since_id'])
+            for reply_id, hashtags in sorted(replies):
+                if reply_id > cursor['since_id']:
+                    cursor['tally'].update(hashtags)
+                    cursor['since_id'] = reply_id
+                    cursor['replies'] += 1
+            if replies:
+                self._save_cursor(cursor)
+            if time_diff >= self.sleep_time:
+                break
+            if self._vote_decided(cursor, valid_hashtags):
+                LOGGER.debug(f"Vote decided after {cursor['replies']} "
+                             f"replies, closing early")
+                break
+            self._wait_for_replies(self.sleep_time - time_diff)
+        return list(cursor['tally'].elements())
 
-    def _get_console_replies(self):
-        """Gather tweet replies from console input, returns None unless
-        called on a TWGBConsoleGame object
+    def _vote_decided(self, cursor, valid_hashtags):
+        """Check if the vote can close early because the expected audience
+        has replied, or because the leader can not be caught by the replies
+        still to come
 
-        :return: None
+        :param cursor: The reply cursor with the running tally
+        :type cursor: dict
+        :param valid_hashtags: The valid hashtags for this part of the story
+        :type valid_hashtags: dict
+        :return: True if the outcome can no longer change
+        :rtype: bool
         """
-        return None
+        if not self.audience or not valid_hashtags:
+            return False
+        remaining = self.audience - cursor['replies']
+        if remaining <= 0:
+            return True
+        votes_text, winner = self._check_votes(
+            list(cursor['tally'].elements()), valid_hashtags)
+        if not winner or winner == 'TIED':
+            return False
+        votes = sorted([cursor['tally'][x] for x in valid_hashtags],
+                       reverse=True)
+        runner_up = votes[1] if len(votes) > 1 else 0
+        # Each remaining reply can add at most one vote to the runner up
+        return votes[0] - runner_up > remaining
+
+    def _load_cursor(self, tweet_id):
+        """Load the reply cursor for a tweet, starting a new one if the saved
+        cursor is for an earlier tweet
 
-    def _get_twitter_replies(self, tweet_id):
+        :param tweet_id: The tweet the replies are to
+        :type tweet_id: int
+        :return: The tweet_id, the last reply ID seen (since_id), the number
+            of replies and the tally of hashtags so far
+        :rtype: dict
+        """
+        try:
+            with open(self.cursor_file, 'r') as f:
+                cursor = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            cursor = {}
+        if cursor.get('tweet_id') == str(tweet_id):
+            LOGGER.debug(f"Resuming replies to {tweet_id} after "
+                         f"{cursor['since_id']}")
+            return {'tweet_id': str(tweet_id), 'since_id': cursor['since_id'],
+                    'replies': cursor.get('replies', 0),
+                    'tally': Counter(cursor['tally'])}
+        else:
+            return {'tweet_id': str(tweet_id), 'since_id': 0, 'replies': 0,
+                    'tally': Counter()}
+
+    def _save_cursor(self, cursor):
+        """Save the reply cursor, replacing the file in one go so a restart
+        never finds half of it
+
+        :param cursor: The cursor from _load_cursor
+        :type cursor: dict
+        """
+        tmp_file = f"{self.cursor_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({'tweet_id': cursor['tweet_id'],
+                       'since_id': cursor['since_id'],
+                       'replies': cursor['replies'],
+                       'tally': dict(cursor['tally'])}, f)
+        os.replace(tmp_file, self.cursor_file)
+
+    def _get_replies(self, tweet_id, since_id):
+        """Gather the replies to a tweet newer than since_id
+
+        :param tweet_id: The tweet id to parse the replies
+        :type tweet_id: int
+        :param since_id: The last reply ID already gathered
+        :type since_id: int
+        :return: (reply_id, hashtags) for each new reply
+        :rtype: list
+        """
+        return self._get_twitter_replies(tweet_id, since_id)
+
+    def _wait_for_replies(self, remaining):
+        """Wait before gathering replies again
+
+        :param remaining: The time left before the vote closes
+        :type remaining: timedelta
+        """
+        sleep(min(self.poll_time, remaining).total_seconds())
+
+    def _get_twitter_replies(self, tweet_id, since_id=0):
         """Gather tweet hashtags from twitter, returns [] for the time being
 
         :param tweet_id: The tweet id to parse the replies
         :type tweet_id: int
+        :param since_id: Only gather replies with a higher ID than this
+        :type since_id: int
         :return: An empty list for now
         :rtype: list
         """
@@ -245,22 +537,38 @@ class TWGBConsoleGame(TWGBGame):
         :return: A random number to simulate twitter message ID
         :rtype: int
         """
-        # First we need to check if we're over the 280 character limit which
-        # the twitter api module obfuscates from us
-        if len(stitch) > 280:
-            # Make a list of the stitch broken at a word boundary around the 280
-            # character point. Send that back up to send_story to manage the
-            # recursion for us
-            tweet_list = wrap(stitch, 280)
-            new_id = self._send_story(tweet_list, tweet_id)
-        else:
-            # Print a new "tweet"
-            new_id = randint(0, 1000000)
-            print(f"==Replying to tweet_id - {tweet_id}==")
-            print(stitch)
-            print(f"=={new_id}==")
+        # The story already splits its posts to the 280 character limit, so
+        # print a new "tweet"
+        new_id = randint(0, 1000000)
+        print(f"==Replying to tweet_id - {tweet_id}==")
+        print(stitch)
+        print(f"=={new_id}==")
         return new_id
 
+    def _get_replies(self, tweet_id, since_id):
+        """Get a reply from the console, numbered on from since_id
+
+        :param tweet_id: The tweet id being replied to
+        :type tweet_id: int
+        :param since_id: The last reply ID already gathered
+        :type since_id: int
+        :return: (reply_id, hashtags) for the entered reply, if any
+        :rtype: list
+        """
+        reply = self._get_console_replies()
+        if reply:
+            return [(since_id + 1, reply)]
+        else:
+            return []
+
+    def _wait_for_replies(self, remaining):
+        """The console waits on input instead
+
+        :param remaining: The time left before the vote closes
+        :type remaining: timedelta
+        """
+        pass
+
     def _get_console_replies(self):
         """Get a "Tweet" from the console
 
@@ -0,0 +1,275 @@
+import io
+import os
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed)
+from glob import glob
+from time import perf_counter
+
+from twgamebook.game import LOGGER
+from twgamebook.story import TWGBStory, read_json
+
+# Sources at least this many bytes are parsed in a separate process
+PARSE_PROCESS_BYTES = 4 * 1024 * 1024
+
+
+class TWGBStoryRegistry(object):
+    """An object for holding many loaded stories, found by their title or
+    their source
+
+    :cvar dict stories: The loaded TWGBStory objects by source
+    :cvar dict titles: The source of each story by title
+    :cvar dict timings: The seconds spent reading, parsing and compiling each
+        story by source
+    :cvar dict errors: The exception raised for each source that could not be
+        loaded
+    """
+
+    def __init__(self):
+        """Object init"""
+        self.stories = {}
+        self.titles = {}
+        self.timings = {}
+        self.errors = {}
+
+    def add(self, story, timings=None):
+        """Add a loaded story to the registry
+
+        :param story: The story to add
+        :type story: twgamebook.story.TWGBStory
+        :param timings: The seconds spent on each step of loading the story
+        :type timings: dict
+        """
+        self.stories[story.source] = story
+        if story.title in self.titles:
+            LOGGER.warning(f"{story.source} has the same title as "
+                           f"{self.titles[story.title]}")
+        self.titles[story.title] = story.source
+        self.timings[story.source] = timings or {}
+
+    def __getitem__(self, key):
+        """Get a story by its title or source
+
+        :param key: The story title or source
+        :type key: str
+        :return: The story
+        :rtype: twgamebook.story.TWGBStory
+        :raises KeyError: if no story has that title or source
+        """
+        if key in self.stories:
+            return self.stories[key]
+        return self.stories[self.titles[key]]
+
+    def __contains__(self, key):
+        return key in self.stories or key in self.titles
+
+    def __iter__(self):
+        return iter(self.stories.values())
+
+    def __len__(self):
+        return len(self.stories)
+
+
+class TWGBStringPool(object):
+    """An object for sharing one copy of each repeated string, such as
+    stitch keys, flag names and option text, across many stories
+
+    Strings are only compared and shared from the thread compiling the
+    stories, so no locking is needed.
+    """
+
+    def __init__(self):
+        """Object init"""
+        self._strings = {}
+
+    def __len__(self):
+        return len(self._strings)
+
+    def get(self, value):
+        """Get the shared copy of a string
+
+        :param value: The string, anything else is returned unchanged
+        :type value: str
+        :return: The shared copy
+        :rtype: str
+        """
+        if isinstance(value, str):
+            return self._strings.setdefault(value, value)
+        return value
+
+    def intern_story(self, story):
+        """Replace the strings in a story's stitches with their shared copies
+
+        :param story: The story to intern
+        :type story: twgamebook.story.TWGBStory
+        """
+        get = self.get
+        for stitch in story.stitches:
+            stitch.key = get(stitch.key)
+            stitch.divert = get(stitch.divert)
+            stitch.page_label = get(stitch.page_label)
+            stitch.flag_names = [get(x) for x in stitch.flag_names]
+            stitch.if_conditions = [get(x) for x in stitch.if_conditions]
+            stitch.not_if_conditions = [get(x) for x in
+                                        stitch.not_if_conditions]
+            for option in stitch.options:
+                option['option'] = get(option['option'])
+                option['linkPath'] = get(option['linkPath'])
+                for name in ('ifConditions', 'notIfConditions'):
+                    for condition in option.get(name) or []:
+                        for key in condition:
+                            condition[key] = get(condition[key])
+        story.initial = get(story.initial)
+
+
+def _read_source(source):
+    """Read the raw bytes of a story source
+
+    :param source: The file path or URL to the source text
+    :type source: str
+    :return: The raw source
+    :rtype: bytes
+    """
+    if source[0:8] == 'https://':
+        import requests
+        r = requests.get(source)
+        r.raise_for_status()
+        return r.content
+    try:
+        with open(source, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise ValueError(f"Source file {source} must either be a local "
+                         f"file or HTTP file")
+
+
+def _parse_source(raw, source):
+    """Decompress if needed and parse a raw source, run in a separate process
+    for big sources
+
+    :param raw: The raw source
+    :type raw: bytes
+    :param source: The file path or URL the source was read from
+    :type source: str
+    :return: The parsed JSON object
+    :rtype: dict
+    """
+    return read_json(io.BytesIO(raw), source)
+
+
+def load_stories(sources, threads=8, processes=None,
+                 parse_process_bytes=PARSE_PROCESS_BYTES):
+    """Load many stories at once into a registry
+
+    Sources are read on a thread pool and parsed as they arrive. Big sources
+    are parsed on a process pool so they do not hold up the rest, then
+    every story is compiled and its strings shared with the other stories.
+    A source that fails to load is logged and kept in the registry errors
+    rather than stopping the others.
+
+    :param sources: The file paths or URLs of the stories
+    :type sources: list
+    :param threads: The number of sources to read at once
+    :type threads: int
+    :param processes: The number of processes for parsing big sources,
+        defaults to the number of CPUs, 0 parses everything in this process
+    :type processes: int
+    :param parse_process_bytes: The size in bytes at which a source is
+        parsed in a separate process
+    :type parse_process_bytes: int
+    :return: The loaded stories
+    :rtype: TWGBStoryRegistry
+    """
+    registry = TWGBStoryRegistry()
+    pool = TWGBStringPool()
+    process_pool = None
+    if processes != 0:
+        process_pool = ProcessPoolExecutor(max_workers=processes)
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as thread_pool:
+            reads = {thread_pool.submit(_timed, _read_source, x): x for x in
+                     sources}
+            parses = {}
+            for future in as_completed(reads):
+                source = reads[future]
+                try:
+                    raw, read_time = future.result()
+                except Exception as e:
+                    _load_failed(registry, source, e)
+                    continue
+                if process_pool and len(raw) >= parse_process_bytes:
+                    parse = process_pool.submit(_parse_source, raw, source)
+                    parses[parse] = (source, perf_counter(), read_time)
+                else:
+                    parse = thread_pool.submit(_timed, _parse_source, raw,
+                                               source)
+                    parses[parse] = (source, None, read_time)
+            for future in as_completed(parses):
+                source, start, read_time = parses[future]
+                try:
+                    if start is None:
+                        source_data, parse_time = future.result()
+                    else:
+                        source_data = future.result()
+                        parse_time = perf_counter() - start
+                    story, compile_time = _timed(TWGBStory, source,
+                                                 source_data)
+                except Exception as e:
+                    _load_failed(registry, source, e)
+                    continue
+                pool.intern_story(story)
+                timings = {'read': read_time, 'parse': parse_time,
+                           'compile': compile_time,
+                           'total': read_time + parse_time + compile_time}
+                LOGGER.debug(f"Loaded {story.title} from {source} in "
+                             f"{timings['total']:.3f}s")
+                registry.add(story, timings)
+    finally:
+        if process_pool:
+            process_pool.shutdown()
+    # Keep the stories in the order they were asked for
+    registry.stories = {x: registry.stories[x] for x in sources if x in
+                        registry.stories}
+    LOGGER.debug(f"Loaded {len(registry)} stories sharing {len(pool)} "
+                 f"strings")
+    return registry
+
+
+def load_directory(path, pattern='*.json', **kwargs):
+    """Load every story in a directory into a registry
+
+    :param path: The directory holding the stories
+    :type path: str
+    :param pattern: The glob pattern for story files
+    :type pattern: str
+    :param kwargs: Passed on to load_stories
+    :return: The loaded stories
+    :rtype: TWGBStoryRegistry
+    """
+    return load_stories(sorted(glob(os.path.join(path, pattern))), **kwargs)
+
+
+def _timed(func, *args):
+    """Call a function and time it
+
+    :param func: The function to call
+    :type func: function
+    :return: The function's result and the seconds it took
+    :rtype: tuple
+    """
+    start = perf_counter()
+    result = func(*args)
+    return result, perf_counter() - start
+
+
+def _load_failed(registry, source, error):
+    """Log and keep a source that could not be loaded
+
+    :param registry: The registry being loaded
+    :type registry: TWGBStoryRegistry
+    :param source: The source that failed
+    :type source: str
+    :param error: The exception raised
+    :type error: Exception
+    """
+    LOGGER.warning(f"Could not load {source}: {error}")
+    registry.errors[source] = error
@@ -0,0 +1,290 @@
+"""
+Usage:
+    runtwgbload -s SOURCE [-g GAMES] [-p PROCESSES] [-n TURNS] [-v VOTES]
+                [--post-latency=MS] [--reply-latency=MS]
+
+Options:
+-s SOURCE --source=SOURCE       Source file for the games, can be a local
+                                file or HTTP
+-g GAMES --games=GAMES          Number of simulated games [default: 10]
+-p PROCESSES --processes=PROCESSES
+                                Number of games to run at once, defaults to
+                                GAMES
+-n TURNS --turns=TURNS          Turns to play in each game, games that reach
+                                an ending start again [default: 20]
+-v VOTES --votes=VOTES          Replies to each vote [default: 50]
+--post-latency=MS               Simulated time to send a post [default: 0]
+--reply-latency=MS              Simulated time to fetch replies [default: 0]
+
+Play many games at once against stand-in posting and reply endpoints, then
+report turn latency percentiles, posts per second, CPU and memory use.
+"""
+import logging
+import os
+import resource
+import tempfile
+from datetime import timedelta
+from multiprocessing import Pool
+from random import Random
+from time import perf_counter, sleep
+
+from twgamebook.game import LOGGER, TWGBGame
+from twgamebook.story import HASHTAG_PATTERN, TWGBStory
+
+
+class _TWGBLoadTestDone(Exception):
+    """Raised to stop a simulated game once it has played its turns"""
+
+
+class TWGBLoadTestGame(TWGBGame):
+    """An object for playing a game as fast as possible against stand-in
+    posting and reply endpoints, timing each turn
+
+    Each vote closes as soon as a batch of synthetic replies, voting for
+    the hashtags in the last post, has been gathered. Turn latency is the
+    time from the vote closing to the last post of the next thread.
+
+    :param story: TWGBStory object to play
+    :type story: twgamebook.story.TWGBStory
+    :param turns: The number of turns to play before stopping
+    :type turns: int
+    :param votes: The number of replies to each vote
+    :type votes: int
+    :param post_latency: Simulated seconds to send each post
+    :type post_latency: float
+    :param reply_latency: Simulated seconds to fetch the replies
+    :type reply_latency: float
+    :param seed: Seed for the synthetic votes
+    :type seed: int
+
+    :cvar list latencies: The seconds taken by each turn
+    :cvar int posts: The number of posts sent
+    """
+
+    def __init__(self, story, turns, votes, post_latency=0.0,
+                 reply_latency=0.0, seed=0, **kwargs):
+        """Initialise the game"""
+        super().__init__(story, '1m', **kwargs)
+        self.sleep_time = timedelta()
+        self.turns = turns
+        self.votes = votes
+        self.post_latency = post_latency
+        self.reply_latency = reply_latency
+        self.latencies = []
+        self.posts = 0
+        self._random = Random(seed)
+        self._next_id = 0
+        self._last_post = ''
+        self._turn_start = perf_counter()
+
+    def _send_stitch(self, stitch, tweet_id):
+        """Send a post to the stand-in posting endpoint
+
+        :param stitch: Text to send
+        :type stitch: str
+        :param tweet_id: Tweet ID to reply to
+        :type tweet_id: int
+        :return: the tweet ID of this post
+        :rtype: int
+        """
+        if self.post_latency:
+            sleep(self.post_latency)
+        self.posts += 1
+        self._next_id += 1
+        self._last_post = stitch
+        return self._next_id
+
+    def _send_story(self, thread, tweet_id=0):
+        """Send the thread and time the turn"""
+        tweet_id = super()._send_story(thread, tweet_id)
+        self.latencies.append(perf_counter() - self._turn_start)
+        if len(self.latencies) >= self.turns:
+            raise _TWGBLoadTestDone()
+        return tweet_id
+
+    def _sleep_for_replies(self, tweet_id, last_time, valid_hashtags=None):
+        """Gather the replies and start timing the next turn"""
+        ret_list = super()._sleep_for_replies(tweet_id, last_time,
+                                              valid_hashtags)
+        self._turn_start = perf_counter()
+        return ret_list
+
+    def _get_replies(self, tweet_id, since_id):
+        """Get a batch of synthetic replies from the stand-in reply endpoint
+
+        :param tweet_id: The tweet id being replied to
+        :type tweet_id: int
+        :param since_id: The last reply ID already gathered
+        :type since_id: int
+        :return: (reply_id, hashtags) for each reply
+        :rtype: list
+        """
+        if self.reply_latency:
+            sleep(self.reply_latency)
+        if since_id:
+            return []
+        hashtags = [x.upper() for x in HASHTAG_PATTERN.findall(
+            self._last_post)]
+        if not hashtags:
+            return []
+        return [(x + 1, [self._random.choice(hashtags)]) for x in
+                range(self.votes)]
+
+    def _wait_for_replies(self, remaining):
+        """Replies are never waited for"""
+        pass
+
+
+def _run_game(task):
+    """Play one simulated game in its own directory, run in a worker
+    process
+
+    :param task: The game number and the load test settings
+    :type task: tuple
+    :return: The turn latencies, post count and the process's CPU seconds
+        and peak memory in kilobytes
+    :rtype: dict
+    """
+    game_number, source, turns, votes, post_latency, reply_latency = task
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_start = usage.ru_utime + usage.ru_stime
+    latencies = []
+    posts = 0
+    start_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as game_dir:
+        # Games keep their state in twgamebook.log in the working directory
+        os.chdir(game_dir)
+        for handler in list(LOGGER.handlers):
+            LOGGER.removeHandler(handler)
+            handler.close()
+        LOGGER.setLevel(logging.INFO)
+        LOGGER.propagate = False
+        log_fh = logging.FileHandler('twgamebook.log')
+        log_fh.setFormatter(logging.Formatter(
+            '%(asctime)s - %(levelname)s - %(message)s',
+            datefmt='%b %d %H:%M'))
+        LOGGER.addHandler(log_fh)
+        story = TWGBStory(source)
+        while len(latencies) < turns:
+            story.set_flags([])
+            my_game = TWGBLoadTestGame(story, turns - len(latencies), votes,
+                                       post_latency, reply_latency,
+                                       seed=game_number)
+            try:
+                my_game.play()
+            except _TWGBLoadTestDone:
+                pass
+            finally:
+                if my_game._executor:
+                    my_game._executor.shutdown()
+            latencies += my_game.latencies
+            posts += my_game.posts
+            if not my_game.latencies:
+                break
+            # The game reached an ending, so start it again
+            log_fh.close()
+            os.remove('twgamebook.log')
+            if os.path.exists(my_game.cursor_file):
+                os.remove(my_game.cursor_file)
+        LOGGER.removeHandler(log_fh)
+        log_fh.close()
+        os.chdir(start_dir)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {'latencies': latencies, 'posts': posts,
+            'cpu': usage.ru_utime + usage.ru_stime - cpu_start,
+            'rss': usage.ru_maxrss}
+
+
+def percentile(values, percent):
+    """Get a percentile of some values by the nearest rank
+
+    :param values: The values, in any order
+    :type values: list
+    :param percent: The percentile to get, from 0 to 100
+    :type percent: float
+    :return: The percentile, or 0 if there are no values
+    :rtype: float
+    """
+    if not values:
+        return 0
+    values = sorted(values)
+    rank = max(int(-(-percent * len(values) // 100)), 1)
+    return values[rank - 1]
+
+
+def load_test(source, games=10, processes=None, turns=20, votes=50,
+              post_latency=0.0, reply_latency=0.0):
+    """Play many simulated games at once and measure them
+
+    :param source: The file path or URL of the story for every game
+    :type source: str
+    :param games: The number of games to play
+    :type games: int
+    :param processes: The number of games to run at once, defaults to games
+    :type processes: int
+    :param turns: The number of turns to play in each game
+    :type turns: int
+    :param votes: The number of replies to each vote
+    :type votes: int
+    :param post_latency: Simulated seconds to send each post
+    :type post_latency: float
+    :param reply_latency: Simulated seconds to fetch the replies
+    :type reply_latency: float
+    :return: The games, turns, posts, wall seconds, turn latency p50, p95
+        and p99 in seconds, posts per second, CPU seconds, CPU percent of
+        one core and the peak RSS of any game in kilobytes
+    :rtype: dict
+    """
+    if source[0:8] != 'https://':
+        source = os.path.abspath(source)
+    tasks = [(x, source, turns, votes, post_latency, reply_latency) for x in
+             range(games)]
+    start = perf_counter()
+    with Pool(processes=processes or games) as pool:
+        results = pool.map(_run_game, tasks)
+    wall = perf_counter() - start
+    latencies = [y for x in results for y in x['latencies']]
+    posts = sum(x['posts'] for x in results)
+    cpu = sum(x['cpu'] for x in results)
+    return {'games': games, 'turns': len(latencies), 'posts': posts,
+            'wall': wall,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'posts_per_second': posts / wall if wall else 0,
+            'cpu': cpu, 'cpu_percent': 100 * cpu / wall if wall else 0,
+            'rss': max([x['rss'] for x in results], default=0)}
+
+
+def format_report(report):
+    """Format a load test report for the console
+
+    :param report: The report from load_test
+    :type report: dict
+    :return: The report text
+    :rtype: str
+    """
+    return (f"Games: {report['games']}  Turns: {report['turns']}  "
+            f"Posts: {report['posts']}  Wall: {report['wall']:.2f}s\n"
+            f"Turn latency p50: {report['p50'] * 1000:.2f}ms  "
+            f"p95: {report['p95'] * 1000:.2f}ms  "
+            f"p99: {report['p99'] * 1000:.2f}ms\n"
+            f"Posts/sec: {report['posts_per_second']:.1f}\n"
+            f"CPU: {report['cpu']:.2f}s ({report['cpu_percent']:.0f}% of one "
+            f"core)  Peak RSS per game: {report['rss'] / 1024:.1f}MB")
+
+
+def main():
+    from docopt import docopt
+    args = docopt(__doc__)
+    processes = args['--processes']
+    report = load_test(args['--source'], games=int(args['--games']),
+                       processes=int(processes) if processes else None,
+                       turns=int(args['--turns']), votes=int(args['--votes']),
+                       post_latency=int(args['--post-latency']) / 1000,
+                       reply_latency=int(args['--reply-latency']) / 1000)
+    print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
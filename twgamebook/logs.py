@@ -0,0 +1,150 @@
+import os
+import re
+
+# The game state is only ever written to the log at INFO level
+INFO_MARKER = ' - INFO - '
+# How much of a log segment to read at a time when reading backwards
+BLOCK_SIZE = 8192
+
+
+def is_info(line):
+    """Check if a log line is a state bearing INFO record
+
+    :param line: The log line
+    :type line: str
+    :return: True or False
+    :rtype: bool
+    """
+    return INFO_MARKER in line
+
+
+def log_segments(path):
+    """List the log file and its rotated segments, newest first
+
+    Size rotated segments are numbered (twgamebook.log.1 is newer than
+    twgamebook.log.2) and time rotated segments carry a timestamp suffix
+    (twgamebook.log.2020-04-23 is older than twgamebook.log.2020-04-24).
+
+    :param path: The path of the current log file
+    :type path: str
+    :return: Paths of the log segments that exist, newest first
+    :rtype: list
+    """
+    log_dir, log_name = os.path.split(path)
+    try:
+        names = os.listdir(log_dir or '.')
+    except FileNotFoundError:
+        return []
+    numbered = []
+    dated = []
+    for name in names:
+        if not name.startswith(f"{log_name}."):
+            continue
+        suffix = name[len(log_name) + 1:]
+        if suffix.isdigit():
+            numbered.append((int(suffix), name))
+        elif re.match(r'^\d{4}-\d{2}-\d{2}', suffix):
+            dated.append(name)
+    ret_list = []
+    if log_name in names:
+        ret_list.append(path)
+    ret_list += [os.path.join(log_dir, x[1]) for x in sorted(numbered)]
+    ret_list += [os.path.join(log_dir, x) for x in sorted(dated,
+                                                            reverse=True)]
+    return ret_list
+
+
+def read_lines_backwards(path):
+    """Yield the lines of a file from the last to the first, reading the file
+    in blocks from the end so only the tail needs to be read
+
+    :param path: The file to read
+    :type path: str
+    :return: Lines without their trailing newline
+    :rtype: generator
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+        while position > 0:
+            read_size = min(BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b'\n')
+            # The first line may carry on in the previous block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode('utf-8')
+        if remainder:
+            yield remainder.decode('utf-8')
+
+
+def last_info_lines(path, count):
+    """Get the last INFO lines from the log, carrying on into the rotated
+    segments if the current log file does not have enough of them
+
+    :param path: The path of the current log file
+    :type path: str
+    :param count: The number of INFO lines to return
+    :type count: int
+    :return: Up to count INFO lines in the order they were logged
+    :rtype: list
+    """
+    ret_list = []
+    for segment in log_segments(path):
+        for line in read_lines_backwards(segment):
+            if is_info(line):
+                ret_list.insert(0, line)
+                if len(ret_list) == count:
+                    return ret_list
+    return ret_list
+
+
+def info_lines(path):
+    """Yield every INFO line from the log and its rotated segments in the
+    order they were logged, a line at a time
+
+    :param path: The path of the current log file
+    :type path: str
+    :return: INFO lines without their trailing newline
+    :rtype: generator
+    """
+    for segment in reversed(log_segments(path)):
+        with open(segment, 'r') as f:
+            for line in f:
+                if is_info(line):
+                    yield line.rstrip('\n')
+
+
+def compact_log(source, dest=None):
+    """Rewrite a log segment keeping only the state bearing INFO records
+
+    :param source: The log segment to compact
+    :type source: str
+    :param dest: Where to write the compacted segment, defaults to replacing
+        the source
+    :type dest: str
+    """
+    tmp_path = f"{dest or source}.tmp"
+    with open(source, 'r') as in_file, open(tmp_path, 'w') as out_file:
+        for line in in_file:
+            if is_info(line):
+                out_file.write(line)
+    os.replace(tmp_path, dest or source)
+    if dest and dest != source:
+        os.remove(source)
+
+
+def compacting_rotator(source, dest):
+    """Rotator for the logging.handlers rotating file handlers that compacts
+    the log segment as it is rotated out
+
+    :param source: The log file being rotated
+    :type source: str
+    :param dest: The name of the rotated segment
+    :type dest: str
+    """
+    if os.path.exists(source):
+        compact_log(source, dest)
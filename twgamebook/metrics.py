@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+from functools import wraps
+from time import perf_counter, time
+
+# Methods timed by default when a game is instrumented
+GAME_METHODS = ['_load_last_log', '_sleep_for_replies', '_get_replies',
+                '_check_votes', '_send_stitch']
+STORY_METHODS = ['get_section', 'render_section', 'get_hashtags']
+
+
+class TWGBMetrics(object):
+    """An object for collecting timers and counters from a running game
+
+    Nothing is measured unless a TWGBMetrics object is given to the game, at
+    which point the methods to be timed are wrapped on that instance only.
+    Games without metrics run the plain methods with no extra overhead.
+
+    :param sinks: Sink objects with an emit(snapshot) method that the
+        metrics are sent to on flush
+    :type sinks: list
+
+    :cvar dict counters: Counter name and its current value
+    :cvar dict timers: Timer name and a dict of its count, total and max
+        seconds
+    """
+
+    def __init__(self, sinks=None):
+        """Object init"""
+        self.sinks = sinks or []
+        self.counters = {}
+        self.timers = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        """Increment a counter
+
+        :param name: The counter to increment
+        :type name: str
+        :param value: The amount to increment by
+        :type value: int
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name, seconds):
+        """Record a single timing against a timer
+
+        :param name: The timer to record against
+        :type name: str
+        :param seconds: The time taken in seconds
+        :type seconds: float
+        """
+        with self._lock:
+            timer = self.timers.setdefault(name, {'count': 0, 'total': 0.0,
+                                                  'max': 0.0})
+            timer['count'] += 1
+            timer['total'] += seconds
+            if seconds > timer['max']:
+                timer['max'] = seconds
+
+    def timer(self, name):
+        """Time a block of code
+
+            with metrics.timer('story_load'):
+                my_story = story.TWGBStory(source_file)
+
+        :param name: The timer to record against
+        :type name: str
+        :return: A context manager recording the time spent inside it
+        :rtype: _TWGBTimer
+        """
+        return _TWGBTimer(self, name)
+
+    def instrument(self, obj, methods):
+        """Wrap methods on an object instance so each call is timed
+
+        Recursive calls are only timed once, from the outermost call.
+
+        :param obj: The object holding the methods, e.g. a TWGBGame
+        :type obj: object
+        :param methods: The names of the methods to time
+        :type methods: list
+        """
+        for name in methods:
+            setattr(obj, name, self._wrap(name, getattr(obj, name)))
+
+    def _wrap(self, name, method):
+        """Build the timing wrapper for a bound method
+
+        :param name: The timer to record against
+        :type name: str
+        :param method: The bound method to time
+        :type method: method
+        :return: The wrapped method
+        :rtype: function
+        """
+        # Methods may also be called from background threads
+        local = threading.local()
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            if getattr(local, 'depth', 0):
+                return method(*args, **kwargs)
+            local.depth = 1
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(name, perf_counter() - start)
+                local.depth = 0
+        return timed
+
+    def snapshot(self):
+        """Get a copy of the current metrics
+
+        :return: The time of the snapshot, counters and timers
+        :rtype: dict
+        """
+        # Timings are recorded from the speculation threads too
+        with self._lock:
+            return {'time': time(), 'counters': dict(self.counters),
+                    'timers': {x: dict(y) for x, y in self.timers.items()}}
+
+    def flush(self):
+        """Send a snapshot of the current metrics to every sink"""
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink.emit(snapshot)
+
+
+class _TWGBTimer(object):
+    """Context manager recording the time spent in a block of code"""
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.name, perf_counter() - self.start)
+        return False
+
+
+class TWGBMemorySink(object):
+    """Keep every metrics snapshot in memory, mostly for tests
+
+    :cvar list snapshots: The snapshots emitted so far
+    """
+
+    def __init__(self):
+        self.snapshots = []
+
+    def emit(self, snapshot):
+        """Store a snapshot
+
+        :param snapshot: The metrics snapshot from TWGBMetrics
+        :type snapshot: dict
+        """
+        self.snapshots.append(snapshot)
+
+
+class TWGBJSONLinesSink(object):
+    """Append each metrics snapshot to a file as a line of JSON
+
+    :param path: The file to append to
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, snapshot):
+        """Append a snapshot
+
+        :param snapshot: The metrics snapshot from TWGBMetrics
+        :type snapshot: dict
+        """
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(snapshot) + '\n')
+
+
+class TWGBPrometheusSink(object):
+    """Write the latest metrics snapshot in the Prometheus text format, for
+    collection by the node exporter textfile collector
+
+    The file is replaced in one go so the collector never reads half of it.
+
+    :param path: The file to write, normally ending in .prom
+    :type path: str
+    :param prefix: Prefix for every metric name
+    :type prefix: str
+    """
+
+    def __init__(self, path, prefix='twgamebook'):
+        self.path = path
+        self.prefix = prefix
+
+    def emit(self, snapshot):
+        """Replace the file with a snapshot
+
+        :param snapshot: The metrics snapshot from TWGBMetrics
+        :type snapshot: dict
+        """
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = f"{self.prefix}_{name.strip('_')}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, timer in sorted(snapshot['timers'].items()):
+            metric = f"{self.prefix}_{name.strip('_')}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            lines.append(f"{metric}_count {timer['count']}")
+            lines.append(f"{metric}_sum {timer['total']:.6f}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            lines.append(f"{metric}_max {timer['max']:.6f}")
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.path)
+
+
+def get_sink(path):
+    """Pick a sink for a file based on its extension, .prom files are
+    written in the Prometheus text format, anything else as JSON lines
+
+    :param path: The file the metrics should be written to
+    :type path: str
+    :return: The sink for the file
+    :rtype: TWGBPrometheusSink, TWGBJSONLinesSink
+    """
+    if path.endswith('.prom'):
+        return TWGBPrometheusSink(path)
+    else:
+        return TWGBJSONLinesSink(path)
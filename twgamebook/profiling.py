@@ -0,0 +1,101 @@
+import cProfile
+import io
+import pstats
+import tracemalloc
+from datetime import datetime
+
+
+class TWGBProfiler(object):
+    """An object for profiling a game one turn at a time
+
+    The profiler is used as a sink for twgamebook.metrics.TWGBMetrics, which
+    the game flushes after every thread it posts. At each flush the functions
+    with the highest cumulative time and the sites that allocated the most
+    memory during the turn are appended to the summary file, along with the
+    game loop timers, and profiling starts afresh for the next turn.
+
+    :param path: The file to write the profile summary to
+    :type path: str
+    :param limit: The number of functions and allocation sites to list
+    :type limit: int
+    :param frames: The number of stack frames tracemalloc keeps per allocation
+    :type frames: int
+    """
+
+    def __init__(self, path, limit=20, frames=1):
+        """Object init"""
+        self.path = path
+        self.limit = limit
+        self.frames = frames
+        self.turn = 0
+        self._profile = None
+        self._snapshot = None
+
+    def start(self):
+        """Start profiling the first turn"""
+        with open(self.path, 'w') as f:
+            f.write(f"twgamebook profile started "
+                    f"{datetime.now():%b %d %H:%M:%S}\n")
+        tracemalloc.start(self.frames)
+        self._snapshot = self._take_snapshot()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def emit(self, snapshot):
+        """Write the summary for the turn that just ended and start profiling
+        the next one
+
+        :param snapshot: The metrics snapshot from TWGBMetrics
+        :type snapshot: dict
+        """
+        self._write_turn(snapshot)
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        """Write the summary for the final, possibly unfinished, turn and
+        stop profiling"""
+        if self._profile:
+            self._write_turn()
+            self._profile = None
+        tracemalloc.stop()
+
+    def _write_turn(self, snapshot=None):
+        """Append the summary of the current turn to the summary file
+
+        :param snapshot: The metrics snapshot from TWGBMetrics, if any
+        :type snapshot: dict
+        """
+        self._profile.disable()
+        self.turn += 1
+        mem_snapshot = self._take_snapshot()
+        stats_stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stats_stream)
+        stats.sort_stats('cumulative').print_stats(self.limit)
+        allocations = mem_snapshot.compare_to(self._snapshot, 'lineno')
+        self._snapshot = mem_snapshot
+        with open(self.path, 'a') as f:
+            f.write(f"\n=== Turn {self.turn} ===\n")
+            if snapshot:
+                f.write('\nGame loop timers:\n')
+                for name, timer in sorted(snapshot['timers'].items()):
+                    f.write(f"  {name}: {timer['count']} calls, "
+                            f"{timer['total']:.6f}s total, "
+                            f"{timer['max']:.6f}s max\n")
+            f.write('\nTop cumulative functions:\n')
+            f.write(stats_stream.getvalue())
+            f.write('Top allocation sites:\n')
+            for stat in allocations[:self.limit]:
+                f.write(f"  {stat}\n")
+
+    def _take_snapshot(self):
+        """Take a tracemalloc snapshot without the profiler's own allocations
+
+        :return: The filtered snapshot
+        :rtype: tracemalloc.Snapshot
+        """
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, pstats.__file__),
+            tracemalloc.Filter(False, cProfile.__file__)])
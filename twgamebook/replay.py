@@ -0,0 +1,191 @@
+"""
+Usage:
+    runtwgbreplay [-l LOG] [-o FILE] SOURCE
+
+Options:
+-l LOG --log=LOG                The game's log file, rotated segments next to
+                                it are read too [default: twgamebook.log]
+-o FILE --output=FILE           Write the transcript to a file instead of the
+                                console
+
+Rebuild every thread a game posted from the state history in its log,
+without waiting for votes or posting anything.
+"""
+import json
+import sys
+
+from twgamebook.game import LOGGER
+from twgamebook.logs import info_lines
+
+
+def _parse_info(line):
+    """Split an INFO line into its time and message
+
+    :param line: The INFO line from the log
+    :type line: str
+    :return: The time the line was logged and the message
+    :rtype: tuple
+    """
+    fields = line.split(' - ', 2)
+    return fields[0], fields[2] if len(fields) > 2 else ''
+
+
+def parse_state(message):
+    """Get the stitch key, flags and runoff hashtags from a game state
+    message
+
+    :param message: The game state message, as written by apply_section
+    :type message: str
+    :return: (key, flags, runoff), or None for a GAMEEND message
+    :rtype: tuple
+    """
+    if message.startswith('GAMEEND '):
+        return None
+    fields = message.split(' - ')
+    runoff = json.loads(fields[2]) if len(fields) > 2 else []
+    return fields[0], json.loads(fields[1]), runoff
+
+
+def turns(log_path):
+    """Yield each turn recorded in the log in a single pass, as the game
+    state messages written while getting the thread and the tweet ID that
+    followed them
+
+    :param log_path: The path of the current log file
+    :type log_path: str
+    :return: (time, state messages, tweet ID) for each turn
+    :rtype: generator
+    """
+    messages = []
+    for line in info_lines(log_path):
+        log_time, message = _parse_info(line)
+        if message.isdigit():
+            if messages:
+                yield log_time, messages, int(message)
+            messages = []
+        elif message.startswith('GAMEEND ') or ' - ' in message:
+            messages.append(message)
+        else:
+            LOGGER.debug(f"Skipping {line} in the replay")
+
+
+def _candidates(story, state, messages):
+    """Work out every section the game could have posted next from a game
+    state
+
+    :param story: The story being replayed
+    :type story: twgamebook.story.TWGBStory
+    :param state: (key, flags, runoff) from the last turn, or None before
+        the first turn
+    :type state: tuple
+    :param messages: The game state messages logged for the next turn
+    :type messages: list
+    :return: (start key, section) for each possible section
+    :rtype: generator
+    """
+    if state is None:
+        yield story.initial, story.render_section(story.initial, [])
+        return
+    key, flags, runoff = state
+    # Any winning option, or an option forced by an administrator
+    for hashtag, next_key in story.get_hashtags(key).items():
+        if not runoff or hashtag in runoff:
+            try:
+                section = story.render_section(next_key, flags)
+            except (KeyError, ValueError) as e:
+                LOGGER.debug(f"Could not render {next_key}: {e}")
+                continue
+            yield next_key, section
+    # The options again after a tied vote, limited to the runoff if there
+    # was one
+    next_state = parse_state(messages[-1])
+    tied = next_state[2] if next_state else []
+    yield key, story.render_options_prompt(key, tied, flags)
+
+
+def replay(story, log_path='twgamebook.log'):
+    """Rebuild every thread a game posted from the state history in its log
+    in a single pass, without sleeping or using the network
+
+    Each turn's thread is re-rendered from the game state before it, trying
+    every option to find those that write the same game state to the log as
+    the game did. Vote counts are not kept in the log, so are not replayed.
+    A turn that cannot be matched, for example because the story was edited
+    or the start of the log has been rotated away, has no thread and the
+    replay carries on from the game state it logged. So does a turn where
+    options that post different threads write the same game state, such as
+    two options that both end the game, with the start keys it could have
+    been played from kept in ambiguous.
+
+    :param story: The story the game was played from
+    :type story: twgamebook.story.TWGBStory
+    :param log_path: The path of the game's log file
+    :type log_path: str
+    :return: A dict for each turn of the time, start key, thread, the game
+        state messages, the tweet ID and the ambiguous start keys
+    :rtype: generator
+    """
+    state = None
+    for log_time, messages, tweet_id in turns(log_path):
+        start = None
+        thread = None
+        # The first start key found for each distinct matching thread
+        matches = {}
+        try:
+            for key, section in _candidates(story, state, messages):
+                if section[2] == messages:
+                    matches.setdefault(tuple(section[0]), key)
+        except (KeyError, ValueError) as e:
+            LOGGER.debug(f"No candidates after {state}: {e}")
+        if len(matches) == 1:
+            (thread, start), = matches.items()
+            thread = list(thread)
+            ambiguous = []
+        elif matches:
+            ambiguous = list(matches.values())
+            LOGGER.warning(f"Could not tell which of {ambiguous} was played "
+                           f"in the turn ending in tweet {tweet_id}")
+        else:
+            ambiguous = []
+            LOGGER.warning(f"Could not replay the turn ending in tweet "
+                           f"{tweet_id}")
+        yield {'time': log_time, 'start': start, 'thread': thread,
+               'state': messages, 'tweet_id': tweet_id,
+               'ambiguous': ambiguous}
+        # After the end of a game, the next one starts from the beginning
+        state = parse_state(messages[-1])
+
+
+def format_turn(turn):
+    """Format a replayed turn for the transcript
+
+    :param turn: The turn from replay
+    :type turn: dict
+    :return: The turn's text
+    :rtype: str
+    """
+    header = f"## {turn['time']} - tweet {turn['tweet_id']}"
+    if turn['thread'] is None and turn['ambiguous']:
+        return f"{header}\n\n[Could not tell which of " \
+               f"{', '.join(turn['ambiguous'])} led to {turn['state'][-1]}]\n"
+    if turn['thread'] is None:
+        return f"{header}\n\n[Could not replay {turn['state'][-1]}]\n"
+    return header + '\n\n' + '\n\n'.join(turn['thread']) + '\n'
+
+
+def main():
+    from docopt import docopt
+    from twgamebook.story import TWGBStory
+    args = docopt(__doc__)
+    story = TWGBStory(args['SOURCE'])
+    out = open(args['--output'], 'w') if args['--output'] else sys.stdout
+    try:
+        for turn in replay(story, args['--log']):
+            out.write(format_turn(turn) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+"""
+Usage:
+    runtwgbd -S SOCKET [-d] SOURCE...
+
+Options:
+-S SOCKET --socket=SOCKET       Unix socket to answer section requests on
+-d                              Switch debugging on
+
+Load every SOURCE into memory and answer story section requests from
+runtwgb games started with --server=SOCKET.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import struct
+import threading
+
+from twgamebook.game import LOGGER
+
+# Each frame is a 4 byte big endian length followed by that much JSON
+_FRAME_HEADER = struct.Struct('>I')
+# The most requests a client sends before reading the answers
+PIPELINE_DEPTH = 64
+# Errors that are passed back to the client to raise again
+_ERRORS = {'KeyError': KeyError, 'ValueError': ValueError}
+
+
+def write_frame(f, message):
+    """Write a message to a stream as a single frame
+
+    :param f: The binary stream to write to
+    :type f: io.BufferedIOBase
+    :param message: The message, which must be JSON serialisable
+    :type message: list
+    """
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    f.write(_FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def read_frame(f):
+    """Read the next frame from a stream
+
+    :param f: The binary stream to read from
+    :type f: io.BufferedIOBase
+    :return: The message, or None if the stream has closed
+    :rtype: list
+    :raises ConnectionError: if the stream closes part way through a frame
+    """
+    header = f.read(_FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < _FRAME_HEADER.size:
+        raise ConnectionError('Connection closed part way through a frame')
+    length = _FRAME_HEADER.unpack(header)[0]
+    payload = f.read(length)
+    if len(payload) < length:
+        raise ConnectionError('Connection closed part way through a frame')
+    return json.loads(payload)
+
+
+class TWGBSectionServer(socketserver.ThreadingMixIn,
+                        socketserver.UnixStreamServer):
+    """A server answering story section requests over a Unix socket from
+    stories held in memory
+
+    Requests are frames of [request_id, op, story, args...] where story is a
+    title or source in the registry, and each is answered in order with a
+    frame of [request_id, 1, result] or [request_id, 0, [error, message]].
+    Clients may send many requests before reading the answers.
+
+    * info - the story's title, author and initial stitch
+    * hashtags, key - get_hashtags(key)
+    * render, key, flags - render_section(key, flags)
+    * prompt, key, hashtags, flags - render_options_prompt(key, hashtags,
+      flags)
+
+    :param socket_path: The path of the Unix socket to listen on
+    :type socket_path: str
+    :param registry: The stories to answer requests from
+    :type registry: twgamebook.loader.TWGBStoryRegistry
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, registry):
+        """Object init"""
+        self.registry = registry
+        socketserver.UnixStreamServer.__init__(self, socket_path,
+                                               _TWGBSectionHandler)
+
+    def answer(self, request):
+        """Answer a single request
+
+        :param request: The request frame
+        :type request: list
+        :return: The response frame
+        :rtype: list
+        """
+        request_id, op, story_key, args = (request[0], request[1],
+                                           request[2], request[3:])
+        try:
+            story = self.registry[story_key]
+            if op == 'info':
+                result = {'title': story.title, 'author': story.author,
+                          'initial': story.initial}
+            elif op == 'hashtags':
+                result = story.get_hashtags(*args)
+            elif op == 'render':
+                result = story.render_section(*args)
+            elif op == 'prompt':
+                result = story.render_options_prompt(*args)
+            else:
+                raise ValueError(f"Unknown request {op}")
+        except (KeyError, ValueError) as e:
+            return [request_id, 0, [type(e).__name__, str(e.args[0]) if
+                                    e.args else '']]
+        except Exception as e:
+            LOGGER.warning(f"Could not answer {request}: {e}")
+            return [request_id, 0, ['Exception', str(e)]]
+        return [request_id, 1, result]
+
+
+class _TWGBSectionHandler(socketserver.StreamRequestHandler):
+    """Answer the requests on one client connection in order"""
+
+    def handle(self):
+        while True:
+            request = read_frame(self.rfile)
+            if request is None:
+                break
+            write_frame(self.wfile, self.server.answer(request))
+
+
+class TWGBStoryClient(object):
+    """An object standing in for a TWGBStory in a TWGBGame, with the story
+    held by a TWGBSectionServer
+
+    Sections are rendered by the server, while the flags and the game state
+    written to the log stay with the client.
+
+    :param socket_path: The path of the server's Unix socket
+    :type socket_path: str
+    :param story: The title or source of the story on the server
+    :type story: str
+
+    :cvar str source: The title or source of the story on the server
+    :cvar str title: The title of this story
+    :cvar str author: The story's author
+    :cvar str initial: The initial stitch key to start the story from
+    :cvar list flags: The list of flags encountered during the story's
+        progress
+    """
+
+    def __init__(self, socket_path, story):
+        """Connect to the server and look up the story"""
+        self.socket_path = socket_path
+        self.source = story
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(socket_path)
+        self._rfile = self._sock.makefile('rb')
+        self._wfile = self._sock.makefile('wb')
+        self._lock = threading.Lock()
+        self._next_id = 0
+        try:
+            info = self._call('info')
+        except Exception:
+            self.close()
+            raise
+        self.title = info['title']
+        self.author = info['author']
+        self.initial = info['initial']
+        self.flags = []
+
+    def close(self):
+        """Close the connection to the server"""
+        self._rfile.close()
+        self._wfile.close()
+        self._sock.close()
+
+    def pipeline(self, calls):
+        """Send many requests before reading any of the answers
+
+        :param calls: (op, args...) for each request
+        :type calls: list
+        :return: The result of each request, in order
+        :rtype: list
+        :raises KeyError: if the server raised a KeyError
+        :raises ValueError: if the server raised a ValueError
+        """
+        responses = []
+        with self._lock:
+            first_id = self._next_id
+            self._next_id += len(calls)
+            # Send in batches so neither side fills the socket buffers while
+            # the other is still writing
+            for start in range(0, len(calls), PIPELINE_DEPTH):
+                batch = calls[start:start + PIPELINE_DEPTH]
+                for offset, call in enumerate(batch, first_id + start):
+                    write_frame(self._wfile, [offset, call[0], self.source] +
+                                list(call[1:]))
+                self._wfile.flush()
+                responses += [read_frame(self._rfile) for x in batch]
+        ret_list = []
+        for offset, response in enumerate(responses):
+            if response is None:
+                raise ConnectionError('Section server closed the connection')
+            if response[0] != first_id + offset:
+                raise ConnectionError('Section server answered out of order')
+            if not response[1]:
+                error, message = response[2]
+                raise _ERRORS.get(error, RuntimeError)(message)
+            ret_list.append(response[2])
+        return ret_list
+
+    def _call(self, op, *args):
+        """Send a single request and wait for the answer
+
+        :param op: The request to make
+        :type op: str
+        :return: The result of the request
+        """
+        return self.pipeline([(op,) + args])[0]
+
+    def get_hashtags(self, key):
+        """Get the hashtags associated with the options, as
+        TWGBStory.get_hashtags"""
+        return self._call('hashtags', key)
+
+    def render_section(self, start_key='', flags=None):
+        """Work out a section of the game on the server, as
+        TWGBStory.render_section"""
+        if flags is None:
+            flags = self.flags
+        return tuple(self._call('render', start_key, list(flags)))
+
+    def render_sections(self, keys, flags=None):
+        """Work out several sections of the game in one pipelined round trip
+
+        :param keys: The keys of the sections' starting stitches
+        :type keys: list
+        :param flags: The flags to render the sections with, defaults to the
+            story flags
+        :type flags: list
+        :return: Each section as returned by render_section
+        :rtype: list
+        """
+        if flags is None:
+            flags = self.flags
+        return [tuple(x) for x in self.pipeline(
+            [('render', x, list(flags)) for x in keys])]
+
+    def apply_section(self, section):
+        """Bring the flags up to date and write the game state to the log, as
+        TWGBStory.apply_section"""
+        ret_list, new_flags, log_messages = section
+        self.flags += new_flags
+        for message in log_messages:
+            LOGGER.info(message)
+        return ret_list
+
+    def get_section(self, start_key='', _ret_list=None):
+        """Read a section of the game until options or an ending is found, as
+        TWGBStory.get_section"""
+        if not _ret_list or not isinstance(_ret_list, list):
+            _ret_list = []
+        return _ret_list + self.apply_section(self.render_section(start_key))
+
+    def render_options_prompt(self, key, hashtags=None, flags=None):
+        """Work out the options prompt for a stitch on the server, as
+        TWGBStory.render_options_prompt"""
+        if flags is None:
+            flags = self.flags
+        return tuple(self._call('prompt', key, hashtags, list(flags)))
+
+    def get_options_prompt(self, key, hashtags=None):
+        """Get the options prompt for a stitch again, as
+        TWGBStory.get_options_prompt"""
+        return self.apply_section(self.render_options_prompt(key, hashtags))
+
+    def reload(self, bookmark=''):
+        """Stories are reloaded by restarting the server, so this never
+        reloads
+
+        :return: False
+        :rtype: bool
+        """
+        return False
+
+    def set_flags(self, flags):
+        """Set the flags for the story externally, as TWGBStory.set_flags"""
+        if isinstance(flags, list):
+            self.flags = flags
+            return True
+        else:
+            raise KeyError('list expected as flags')
+
+
+def serve(socket_path, sources):
+    """Load the stories and answer section requests until interrupted
+
+    :param socket_path: The path of the Unix socket to listen on
+    :type socket_path: str
+    :param sources: The file paths or URLs of the stories
+    :type sources: list
+    """
+    from twgamebook.loader import load_stories
+    registry = load_stories(sources)
+    # Clear out a socket left behind by a server that did not shut down
+    if os.path.exists(socket_path) and \
+            stat.S_ISSOCK(os.stat(socket_path).st_mode):
+        os.remove(socket_path)
+    with TWGBSectionServer(socket_path, registry) as server:
+        LOGGER.info(f"Serving {len(registry)} stories on {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+def main():
+    from docopt import docopt
+    args = docopt(__doc__)
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%b %d %H:%M')
+    LOGGER.setLevel(logging.DEBUG if args['-d'] else logging.INFO)
+    try:
+        serve(args['--socket'], args['SOURCE'])
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+import json
+import logging
+from collections import Counter
+from datetime import datetime
+
+from twgamebook.game import LOGGER
+from twgamebook.replay import parse_state
+
+# Bumped whenever the serialised form changes
+SNAPSHOT_VERSION = 1
+
+
+class TWGBSnapshot(object):
+    """The full state of a game at one point, as held in the log and the
+    reply cursor, that can be saved, restored into a game or forked
+
+    :param title: The title of the story being played
+    :type title: str
+    :param bookmark: The stitch key the game is waiting on, empty if the game
+        has not started
+    :type bookmark: str
+    :param flags: The story flags
+    :type flags: list
+    :param tweet_id: The last tweet ID posted
+    :type tweet_id: int
+    :param runoff: The hashtags in a runoff, or an empty list
+    :type runoff: list
+    :param last_time: The time the last thread was posted
+    :type last_time: datetime
+    :param since_id: The last reply ID counted
+    :type since_id: int
+    :param replies: The number of replies counted
+    :type replies: int
+    :param tally: The hashtags counted so far in the open vote
+    :type tally: Counter
+    :param ended: The game has reached an ending
+    :type ended: bool
+    """
+
+    def __init__(self, title, bookmark='', flags=None, tweet_id=0,
+                 runoff=None, last_time=None, since_id=0, replies=0,
+                 tally=None, ended=False):
+        """Object init"""
+        self.title = title
+        self.bookmark = bookmark
+        self.flags = list(flags or [])
+        self.tweet_id = int(tweet_id)
+        self.runoff = list(runoff or [])
+        self.last_time = last_time
+        self.since_id = since_id
+        self.replies = replies
+        self.tally = Counter(tally or {})
+        self.ended = ended
+
+    def __eq__(self, other):
+        return isinstance(other, TWGBSnapshot) and \
+            self.to_bytes() == other.to_bytes()
+
+    def to_bytes(self):
+        """Serialise the snapshot as compact JSON
+
+        :return: The serialised snapshot
+        :rtype: bytes
+        """
+        last_time = self.last_time.isoformat() if self.last_time else None
+        return json.dumps([SNAPSHOT_VERSION, self.title, self.bookmark,
+                           self.flags, self.tweet_id, self.runoff, last_time,
+                           self.since_id, self.replies, dict(self.tally),
+                           self.ended], separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a snapshot serialised by to_bytes
+
+        :param data: The serialised snapshot
+        :type data: bytes
+        :return: The snapshot
+        :rtype: TWGBSnapshot
+        :raises ValueError: if the data is not a snapshot this version can
+            read
+        """
+        try:
+            fields = json.loads(data)
+        except ValueError:
+            LOGGER.warning('Could not read the snapshot')
+            raise ValueError('Could not read the snapshot')
+        if not isinstance(fields, list) or not fields or \
+                fields[0] != SNAPSHOT_VERSION:
+            LOGGER.warning('Unsupported snapshot version')
+            raise ValueError('Unsupported snapshot version')
+        (title, bookmark, flags, tweet_id, runoff, last_time, since_id,
+         replies, tally, ended) = fields[1:]
+        if last_time:
+            last_time = datetime.fromisoformat(last_time)
+        return cls(title, bookmark, flags, tweet_id, runoff, last_time,
+                   since_id, replies, tally, ended)
+
+    @classmethod
+    def from_game(cls, game):
+        """Take a snapshot of a game from its log and reply cursor
+
+        :param game: The game to take a snapshot of
+        :type game: twgamebook.game.TWGBGame
+        :return: The snapshot
+        :rtype: TWGBSnapshot
+        """
+        last_pos = game._load_last_log()
+        title = game.story.title
+        if not last_pos:
+            return cls(title)
+        if f"GAMEEND {title}" in last_pos:
+            return cls(title, ended=True)
+        last_time, bookmark, flags, tweet_id, runoff = last_pos
+        cursor = game._load_cursor(tweet_id)
+        return cls(title, bookmark, flags, tweet_id, runoff, last_time,
+                   cursor['since_id'], cursor['replies'], cursor['tally'])
+
+    def restore(self, game):
+        """Restore the snapshot into a game, writing the game state to the
+        log and the reply cursor so the game carries on from the snapshot
+        the next time it is played
+
+        :param game: The game to restore into
+        :type game: twgamebook.game.TWGBGame
+        :raises ValueError: if the snapshot is of a different story, or of a
+            game that had not started
+        """
+        self._check_title(game.story)
+        if not self.bookmark and not self.ended:
+            LOGGER.warning('Can not restore a game that had not started')
+            raise ValueError('Can not restore a game that had not started')
+        if self.ended:
+            state = f"GAMEEND {self.title}"
+        else:
+            state = f"{self.bookmark} - {json.dumps(self.flags)}"
+            if self.runoff:
+                state += f" - {json.dumps(self.runoff)}"
+        # Log the state with its original time so the vote closes when it
+        # would have done
+        created = self.last_time.timestamp() if self.last_time else None
+        for message in (state, str(self.tweet_id)):
+            record = LOGGER.makeRecord(LOGGER.name, logging.INFO, __file__, 0,
+                                       message, (), None)
+            if created is not None:
+                record.created = created
+            LOGGER.handle(record)
+        game._save_cursor({'tweet_id': str(self.tweet_id),
+                           'since_id': self.since_id,
+                           'replies': self.replies, 'tally': self.tally})
+        game.story.set_flags(list(self.flags))
+
+    def fork(self, story, tie_break='prompt'):
+        """Start a lightweight copy of the game from the snapshot
+
+        :param story: The story the game is played from, which is shared
+            with the fork and not changed by it
+        :type story: twgamebook.story.TWGBStory
+        :param tie_break: What the fork posts when the vote is tied, as the
+            game does
+        :type tie_break: str
+        :return: The fork
+        :rtype: TWGBGameFork
+        """
+        return TWGBGameFork(story, self, tie_break)
+
+    def _check_title(self, story):
+        """Check the snapshot is of a story
+
+        :param story: The story to check
+        :type story: twgamebook.story.TWGBStory
+        :raises ValueError: if the snapshot is of a different story
+        """
+        if story.title != self.title:
+            LOGGER.warning(f"Snapshot of {self.title} does not match "
+                           f"{story.title}")
+            raise ValueError(f"Snapshot of {self.title} does not match "
+                             f"{story.title}")
+
+
+class TWGBGameFork(object):
+    """A lightweight copy of a game that advances through the story on its
+    own, for previewing alternatives or running shadow games
+
+    Forks share the story with the game and with each other. Sections are
+    rendered against the fork's own flags, so nothing is written to the log
+    or posted, and neither the story nor any other fork is changed. The
+    tweet ID stays at the one the fork started from. A tied vote is settled
+    as the game settles it, by posting the options again.
+
+    :param story: The story the game is played from
+    :type story: twgamebook.story.TWGBStory
+    :param snapshot: The game state to start from
+    :type snapshot: TWGBSnapshot
+    :param tie_break: What to post when the vote is tied, 'prompt' posts the
+        options again and 'runoff' only the tied options
+    :type tie_break: str
+
+    :cvar list threads: The threads posted by the fork so far
+    """
+
+    def __init__(self, story, snapshot, tie_break='prompt'):
+        """Object init"""
+        snapshot._check_title(story)
+        if tie_break not in ('prompt', 'runoff'):
+            raise ValueError("Tie break expects 'prompt' or 'runoff'")
+        self.story = story
+        self.tie_break = tie_break
+        self.bookmark = snapshot.bookmark
+        self.flags = list(snapshot.flags)
+        self.tweet_id = snapshot.tweet_id
+        self.runoff = list(snapshot.runoff)
+        self.since_id = snapshot.since_id
+        self.replies = snapshot.replies
+        self.tally = Counter(snapshot.tally)
+        self.ended = snapshot.ended
+        self.threads = []
+
+    def get_hashtags(self):
+        """Get the hashtags that can be chosen next
+
+        :return: Hashtags and their associated stitch keys
+        :rtype: dict
+        """
+        if self.ended or not self.bookmark:
+            return {}
+        valid_hashtags = self.story.get_hashtags(self.bookmark)
+        if self.runoff:
+            valid_hashtags = {x: y for x, y in valid_hashtags.items() if x in
+                              self.runoff}
+        return valid_hashtags
+
+    def vote(self, hashtags):
+        """Count a reply towards the open vote
+
+        :param hashtags: The hashtags in the reply
+        :type hashtags: list
+        """
+        self.tally.update(x.upper() for x in hashtags)
+        self.replies += 1
+
+    def advance(self, hashtag=''):
+        """Advance the fork to the next options or ending
+
+        :param hashtag: The option to follow, defaults to the most voted for
+            valid hashtag. Not needed to start a game that has not started
+        :type hashtag: str
+        :return: The thread that would be posted, the options again if the
+            vote is tied
+        :rtype: list
+        :raises KeyError: if the hashtag is not a valid option, or there are
+            no votes to pick one from
+        :raises ValueError: if the game has ended
+        """
+        if self.ended:
+            LOGGER.warning('The fork has reached an ending')
+            raise ValueError('The fork has reached an ending')
+        if self.bookmark:
+            valid_hashtags = self.get_hashtags()
+            if not hashtag:
+                votes = [x for x in self.tally.most_common() if x[0] in
+                         valid_hashtags]
+                tied = [x[0] for x in votes if x[1] == votes[0][1]]
+                if len(tied) > 1:
+                    # Post the options again, as the game would
+                    return self._post(self.story.render_options_prompt(
+                        self.bookmark,
+                        tied if self.tie_break == 'runoff' else None,
+                        self.flags))
+                hashtag = votes[0][0] if votes else ''
+            if hashtag.upper() not in valid_hashtags:
+                LOGGER.warning(f"{hashtag} is not an option at "
+                               f"{self.bookmark}")
+                raise KeyError(f"{hashtag} is not an option at "
+                               f"{self.bookmark}")
+            next_key = valid_hashtags[hashtag.upper()]
+        else:
+            next_key = self.story.initial
+        return self._post(self.story.render_section(next_key, self.flags))
+
+    def _post(self, section):
+        """Bring the fork up to date with a section, as if it was posted and
+        a new vote opened
+
+        :param section: The section from render_section or
+            render_options_prompt
+        :type section: tuple
+        :return: The thread that would be posted
+        :rtype: list
+        """
+        thread, new_flags, log_messages = section
+        self.flags = self.flags + new_flags
+        state = parse_state(log_messages[-1])
+        if state is None:
+            self.ended = True
+            self.runoff = []
+        else:
+            self.bookmark = state[0]
+            self.runoff = state[2]
+        self.since_id = 0
+        self.replies = 0
+        self.tally = Counter()
+        self.threads.append(thread)
+        return thread
+
+    def fork(self):
+        """Copy this fork so the copy can advance separately
+
+        :return: The copy
+        :rtype: TWGBGameFork
+        """
+        return TWGBGameFork(self.story, self.snapshot(), self.tie_break)
+
+    def snapshot(self):
+        """Take a snapshot of the fork, for instance to restore it into the
+        game
+
+        :return: The snapshot
+        :rtype: TWGBSnapshot
+        """
+        return TWGBSnapshot(self.story.title, self.bookmark, self.flags,
+                            self.tweet_id, self.runoff, None, self.since_id,
+                            self.replies, self.tally, self.ended)
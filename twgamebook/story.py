@@ -1,10 +1,135 @@
+import io
 import json
+import os
 import re
-
-import requests
+from textwrap import wrap
 
 from twgamebook.game import LOGGER
 
+HASHTAG_PATTERN = re.compile('#[0-9a-zA-Z]+')
+# Inklewriter's bold *-text-* and italic /=text=/ markup
+BOLD_PATTERN = re.compile(r'\*-(.*?)-\*', re.DOTALL)
+ITALIC_PATTERN = re.compile(r'/=(.*?)=/', re.DOTALL)
+# Runs of whitespace within a line, and blank lines between paragraphs
+SPACES_PATTERN = re.compile(r'[^\S\n]+')
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+# The longest post that can be sent
+POST_LENGTH = 280
+
+
+def open_decompressed(stream):
+    """Wrap a binary stream so it is decompressed as it is read, if it starts
+    with the magic bytes of a gzip, bzip2 or xz file
+
+    :param stream: A binary file-like object
+    :type stream: io.RawIOBase, io.BufferedIOBase
+    :return: A binary file-like object giving the decompressed data, or the
+        original data if it is not compressed
+    :rtype: io.BufferedIOBase
+    """
+    if not hasattr(stream, 'peek'):
+        stream = io.BufferedReader(stream)
+    magic = stream.peek(6)[:6]
+    if magic[:2] == b'\x1f\x8b':
+        import gzip
+        return gzip.GzipFile(fileobj=stream)
+    elif magic[:3] == b'BZh':
+        import bz2
+        return bz2.BZ2File(stream)
+    elif magic == b'\xfd7zXZ\x00':
+        import lzma
+        return lzma.LZMAFile(stream)
+    else:
+        return stream
+
+
+def read_json(stream, source):
+    """Parse JSON from a binary stream, decompressing it as it is read if it
+    is compressed
+
+    :param stream: A binary file-like object
+    :type stream: io.RawIOBase, io.BufferedIOBase
+    :param source: The file path or URL the stream is from, for errors
+    :type source: str
+    :return: The parsed JSON object
+    :rtype: dict
+    :raises ValueError: if the compressed data is corrupt or cut short
+    :raises json.JSONDecodeError: if the JSON could not be parsed
+    """
+    import lzma
+    import zlib
+    try:
+        return json.load(open_decompressed(stream))
+    except (OSError, EOFError, lzma.LZMAError, zlib.error) as e:
+        LOGGER.warning(f"Could not decompress {source}: {e}")
+        raise ValueError(f"Could not decompress {source}: {e}")
+
+
+def render_content(content):
+    """Render inklewriter stitch content as the plain text to post
+
+    Bold and italic markup is removed, runs of spaces are collapsed to one,
+    spaces are stripped from the ends of lines and no more than one blank
+    line is kept between paragraphs.
+
+    :param content: The stitch content from the inklewriter source JSON
+    :type content: str
+    :return: The plain text
+    :rtype: str
+    """
+    text = ITALIC_PATTERN.sub(r'\1', BOLD_PATTERN.sub(r'\1', content))
+    text = '\n'.join(x.strip() for x in SPACES_PATTERN.sub(' ', text).split(
+        '\n'))
+    return BLANK_LINES_PATTERN.sub('\n\n', text).strip()
+
+
+def split_posts(text, length=POST_LENGTH):
+    """Split text into posts no longer than the post length
+
+    Whole lines are kept together in a post where they fit, with paragraphs
+    and lines joined as they were. Only a line too long for a post of its own
+    is broken, at word boundaries.
+
+    :param text: The text to split
+    :type text: str
+    :param length: The longest post allowed
+    :type length: int
+    :return: The posts
+    :rtype: list
+    """
+    if len(text) <= length:
+        return [text]
+    posts = []
+    for paragraph in text.split('\n\n'):
+        separator = '\n\n'
+        for line in paragraph.split('\n'):
+            if not line:
+                continue
+            if len(line) > length:
+                posts += wrap(line, length, replace_whitespace=False)
+            elif posts and len(posts[-1]) + len(separator) + len(line) <= \
+                    length:
+                posts[-1] += separator + line
+            else:
+                posts.append(line)
+            separator = '\n'
+    return posts
+
+
+def render_prompt(options):
+    """Render the prompt asking which option to follow, split into posts
+
+    :param options: The options from the stitch to include
+    :type options: list
+    :return: The posts
+    :rtype: list
+    """
+    ret_str = 'Should we:\n\n'
+    for option in options:
+        ret_str += f"* {option['option']}\n"
+    ret_str += '\nReply to this tweet with your preferred Hashtag'
+    return split_posts(ret_str)
+
 
 class TWGBStitch(object):
     """An object for managing the individual story stitches.
@@ -17,7 +142,10 @@ class TWGBStitch(object):
     :param dict stitch: The stitch data from the inklewriter source JSON
 
     :cvar str key: Unique key for this stitch
-    :cvar str content: Text for this stitch
+    :cvar str content: Text for this stitch, as written in inklewriter
+    :cvar str text: Plain text for this stitch, rendered from the content
+        when the story is loaded
+    :cvar list posts: The text split into posts no longer than POST_LENGTH
     :cvar str divert: Key for the next stitch in the story. Only provided if
         there are no options and the story has not ended.
     :cvar list options: A list of possible options to follow after this stitch
@@ -38,6 +166,8 @@ class TWGBStitch(object):
         LOGGER.debug(f"Building switch obect {key}")
         self.key = key
         self.content = stitch['content'][0]
+        self.text = render_content(self.content)
+        self.posts = split_posts(self.text)
         self.divert = ''
         self.options = []
         self.flag_names = []
@@ -81,11 +211,15 @@ class TWGBStory(object):
     """An object for loading JSON files from inklewriter.com and managing the
     story and it's stitches
 
-    :param str source_file: The file path or URL to the source text
+    :param str source_file: The file path or URL to the source text, which
+        may be gzip, bzip2 or xz compressed
+    :param dict source_data: The already parsed inklewriter JSON object, if
+        the source has been loaded elsewhere
 
     :raises KeyError: if a string is not provided to the constructor
     :raises ValueError: if the source file is not an inklewriter.com JSON
-        object or if the local file could not be found
+        object, if the local file could not be found or if a compressed
+        source is corrupt or cut short
     :raises ConnectionError: if there are any network issues connecting to
         inklewriter.com
     :raises Timeout: if there is a network timeout connecting to inklewriter.com
@@ -95,6 +229,7 @@ class TWGBStory(object):
         inklewriter.com
     :raises json.JSONDecodeError: if there was an issue decoding the JSON file
 
+    :cvar str source: The file path or URL the story was loaded from
     :cvar str title: The title of this story
     :cvar str author: The story's author
     :cvar str initial: The initial stitch key to start the story from
@@ -103,26 +238,62 @@ class TWGBStory(object):
         progress
     """
 
-    def __init__(self, source):
+    def __init__(self, source, source_data=None):
         """Build the twgamebook object"""
         if isinstance(source, str):
-            if source[0:8] == 'https://':
-                source_data = self._load_http_json(source)
-            else:
-                source_data = self._load_local_json(source)
-            if 'title' and 'data' in source_data:
-                self.title = source_data['title']
-                self.author = source_data['data']['editorData']['authorName']
-                self.initial = source_data['data']['initial']
-                self.stitches = self._load_stitches(source_data['data'][
-                                                         'stitches'])
-                self.flags = []
-            else:
-                LOGGER.warning('Did not find expected Inklewriter JSON object')
-                raise ValueError('Expected Inklewriter JSON object')
+            self.source = source
+            # Only looked up once the story is reloaded, so loading never
+            # waits on an extra request
+            self._source_stamp = None
+            source_data = self._load_source(source_data)
+            self.title = source_data['title']
+            self.author = source_data['data']['editorData']['authorName']
+            self.initial = source_data['data']['initial']
+            self._stitch_data = source_data['data']['stitches']
+            self.stitches = self._load_stitches(self._stitch_data)
+            self.flags = []
         else:
             raise KeyError('Expected string object as source')
 
+    def _load_source(self, source_data=None):
+        """Load and check the inklewriter JSON object from the story source
+
+        :param source_data: The already parsed JSON object, if any
+        :type source_data: dict
+        :return: The parsed JSON object
+        :rtype: dict
+        :raises ValueError: if the source is not an inklewriter.com JSON object
+        """
+        if source_data is not None:
+            pass
+        elif self.source[0:8] == 'https://':
+            source_data = self._load_http_json(self.source)
+        else:
+            source_data = self._load_local_json(self.source)
+        if 'title' and 'data' in source_data:
+            return source_data
+        else:
+            LOGGER.warning('Did not find expected Inklewriter JSON object')
+            raise ValueError('Expected Inklewriter JSON object')
+
+    def _get_source_stamp(self):
+        """Get a marker that changes whenever the story source changes
+
+        Local files use their modification time, HTTP sources use the ETag
+        (or Last-Modified) header from a HEAD request.
+
+        :return: The source marker, or None if one could not be found
+        :rtype: float, str
+        """
+        if self.source[0:8] == 'https://':
+            import requests
+            r = requests.head(self.source)
+            return r.headers.get('ETag') or r.headers.get('Last-Modified')
+        try:
+            return os.stat(self.source).st_mtime
+        except FileNotFoundError:
+            return None
+
     def _load_http_json(self, source_url):
         """Get the source file from the internet
 
@@ -130,29 +301,38 @@ class TWGBStory(object):
         :return: Parsed JSON object
         """
         LOGGER.debug(f"{source_url} provided as URL")
+        # requests is slow to import and only needed for remote sources
+        import requests
         # Get the file via requests. If it raises as error, so be it
-        r = requests.get(source_url)
-        # We should get a 200, otherwise we'll raise an error through the
-        # Response
-        if r.status_code == 200:
-            source_json = r.json()
-            return source_json
-        else:
-            r.raise_for_status()
+        # Stream the body so compressed sources are decompressed as they
+        # arrive rather than held in memory first
+        with requests.get(source_url, stream=True) as r:
+            # We should get a 200, otherwise we'll raise an error through the
+            # Response
+            if r.status_code == 200:
+                # Let urllib3 undo any Content-Encoding from the server
+                r.raw.decode_content = True
+                source_json = read_json(r.raw, source_url)
+                return source_json
+            else:
+                r.raise_for_status()
 
     def _load_local_json(self, source_file):
-        """Get the source file from local disk
+        """Get the source file from local disk, which may be gzip, bzip2 or
+        xz compressed
 
         :param source_file: Path to the locally stored source file
         :type source_file: str
         :return: The parsed JSON object
         :rtype: dict
+        :raises ValueError: If the file could not be found, or is compressed
+            and corrupt or cut short
         :raises json.JSONDecodeError: If json was unable to parse the file
         """
         try:
             LOGGER.debug(f"Attempting to open {source_file}")
-            with open(source_file, 'r') as f:
-                source_json = json.loads(f.read())
+            with open(source_file, 'rb') as f:
+                source_json = read_json(f, source_file)
         except FileNotFoundError:
             LOGGER.warning(f"Could not open {source_file}")
             raise ValueError(
@@ -191,31 +371,22 @@ class TWGBStory(object):
         else:
             return None
 
-    def _get_options(self, options):
+    def _get_options(self, options, flags=None):
         """Generate the section endings when options are present on the stitch
 
         :param options: The list of options from the stitch
         :type options: list
+        :param flags: The flags to check the option conditions against,
+            defaults to the story flags
+        :type flags: list
         :return: List of section ending tweets, or a TWGBStitch if only one
             option could be followed
         :rtype: list, TWGBStitch
         """
         # First thing is to filter the options down if there are conditions
         # attached to them
-        filtered_options = []
-        for option in options:
-            if option['ifConditions']:
-                if_conditions = [x['ifCondition'] for x in
-                                 option['ifConditions']]
-            else:
-                if_conditions = []
-            if option['notIfConditions']:
-                not_if_conditions = [x['notIfCondition'] for x in option[
-                    'notIfConditions']]
-            else:
-                not_if_conditions = []
-            if self._pass_conditions(if_conditions, not_if_conditions):
-                filtered_options.append(option)
+        filtered_options = [x for x in options if
+                            self._pass_option_conditions(x, flags)]
         # Filtering done are we left with only one option? If we're left with
         # none we've broken the game and it's likely broken on inklewriter as
         # well
@@ -225,87 +396,231 @@ class TWGBStory(object):
             return self._get_stitch(next_key)
         else:
             # Let's go!
-            ret_str = 'Should we:\n\n'
-            for option in filtered_options:
-                ret_str += f"* {option['option']}\n"
-            ret_str += '\nReply to this tweet with your preferred Hashtag'
-            return [ret_str]
+            return render_prompt(filtered_options)
+
+    def _pass_option_conditions(self, option, flags=None):
+        """Check the conditions related to displaying an option
+
+        :param option: The option from the stitch
+        :type option: dict
+        :param flags: The flags to check against, defaults to the story flags
+        :type flags: list
+        :return: True or False
+        :rtype: bool
+        """
+        if option['ifConditions']:
+            if_conditions = [x['ifCondition'] for x in option['ifConditions']]
+        else:
+            if_conditions = []
+        if option['notIfConditions']:
+            not_if_conditions = [x['notIfCondition'] for x in option[
+                'notIfConditions']]
+        else:
+            not_if_conditions = []
+        return self._pass_conditions(if_conditions, not_if_conditions, flags)
 
-    def _pass_conditions(self, if_conditions=[], not_if_conditions=[]):
+    def _pass_conditions(self, if_conditions=[], not_if_conditions=[],
+                         flags=None):
         """ Check the conditions related to displaying the option or stitch
 
         :param if_conditions: List of the ifConditions flags to check for
         :type if_conditions: list
         :param not_if_conditions: List of the notIfConditions flags to check for
         :type not_if_conditions: list
+        :param flags: The flags to check against, defaults to the story flags
+        :type flags: list
         :return: True or False
         :rtype: bool
         """
+        if flags is None:
+            flags = self.flags
         # Assume things are true
         if_result = True
         not_if_result = True
         if if_conditions:
-            if_result = all(item in self.flags for item in if_conditions)
+            if_result = all(item in flags for item in if_conditions)
         if not_if_conditions:
-            not_if_result = any(item not in self.flags for item in
+            not_if_result = any(item not in flags for item in
                                 not_if_conditions)
         return if_result and not_if_result
 
-    def get_section(self, start_key='', _ret_list=[]):
-        """Read a section of the game until options or an ending is found
+    def render_section(self, start_key='', flags=None):
+        """Work out a section of the game without changing the story flags or
+        writing to the log, so sections can be rendered ahead of time
 
-        :param start_key: The key for the starting stitch of the story. Leaving
-            this blank will start the story from the beginning
+        :param start_key: The key for the starting stitch of the section.
+            Leaving this blank will start the story from the beginning
         :type start_key: str
-        :param _ret_list: The cumulative previously returned stitch, used in
-            recursion
-        :type _ret_list: str
-        :return: A list of paragraphs with the options as the final paragrah
-            for this section
-        :rtype: list
+        :param flags: The flags to render the section with, defaults to the
+            story flags
+        :type flags: list
+        :return: The list of paragraphs for the section, the flags the
+            section adds and the game state messages to write to the log
+        :rtype: tuple
         :raises KeyError: if start_key can not be found in the story
+        :raises ValueError: if the section loops back on itself forever
         """
-        # _ret_list isn't being cleared when the method finishes, leading to
-        # subsequent calls being a cumulative version of the results. Must be a
-        # pythonic quirk I need to learn more about.
-        if not _ret_list or not isinstance(_ret_list, list):
-            _ret_list = []
         if not start_key or not isinstance(start_key, str):
             start_key = self.initial
-        LOGGER.debug(f"using Stitch ID {start_key}")
+        if flags is None:
+            flags = self.flags
+        flags = list(flags)
+        new_flags = []
+        ret_list = []
+        log_messages = []
+        # Flags are only ever added, so a stitch reached again with no new
+        # flags set will loop round the same stitches forever
+        flag_set = set(flags)
+        visited = set()
         stitch = self._get_stitch(start_key)
-        if stitch:
+        while stitch:
+            LOGGER.debug(f"using Stitch ID {stitch.key}")
+            if (stitch.key, len(flag_set)) in visited:
+                LOGGER.warning(f"The section loops forever at {stitch.key}")
+                raise ValueError(f"The section loops forever at {stitch.key}")
+            visited.add((stitch.key, len(flag_set)))
+            flag_set.update(stitch.flag_names)
             # Update game flags
-            self.flags += stitch.flag_names
+            flags += stitch.flag_names
+            new_flags += stitch.flag_names
             # Check if we display this stitch:
             if self._pass_conditions(stitch.if_conditions,
-                                     stitch.not_if_conditions):
-                _ret_list += [stitch.content]
+                                     stitch.not_if_conditions, flags):
+                ret_list += stitch.posts
             # Now look if we need to keep going to the next piece
             if stitch.divert:
-                return self.get_section(stitch.divert, _ret_list)
+                start_key = stitch.divert
+                stitch = self._get_stitch(start_key)
             # Or generate our options, there shouldn't be both
             elif stitch.options:
-                # Write the option key and flags to the log
-                LOGGER.info(f"{stitch.key} - {json.dumps(self.flags)}")
+                # Keep the option key and flags for the log
+                log_messages.append(f"{stitch.key} - {json.dumps(flags)}")
                 # Format the options, if there aren't any the next stitch
                 # will be returned instead
-                option_tweets = self._get_options(stitch.options)
+                option_tweets = self._get_options(stitch.options, flags)
                 if isinstance(option_tweets, TWGBStitch):
-                    return self.get_section(option_tweets.key, _ret_list)
+                    start_key = option_tweets.key
+                    stitch = option_tweets
                 else:
-                    _ret_list += option_tweets
-                    return _ret_list
+                    ret_list += option_tweets
+                    return ret_list, new_flags, log_messages
             # Otherwise we've reached an ending
             else:
-                # Write that we ended to the log
-                LOGGER.info(f"GAMEEND {self.title}")
-                _ret_list += [f"Thank you for playing {self.title} by" \
-                            f" {self.author}"]
-                return _ret_list
+                log_messages.append(f"GAMEEND {self.title}")
+                ret_list += split_posts(f"Thank you for playing "
+                                        f"{self.title} by {self.author}")
+                return ret_list, new_flags, log_messages
+        LOGGER.warning(f"Could not find {start_key} in the game")
+        raise KeyError(f"Could not find {start_key} in the game")
+
+    def apply_section(self, section):
+        """Bring the story up to date with a section from render_section,
+        adding its flags to the story and writing the game state to the log
+
+        :param section: The section returned by render_section
+        :type section: tuple
+        :return: A list of paragraphs with the options as the final paragraph
+            for this section
+        :rtype: list
+        """
+        ret_list, new_flags, log_messages = section
+        self.flags += new_flags
+        for message in log_messages:
+            LOGGER.info(message)
+        return ret_list
+
+    def get_section(self, start_key='', _ret_list=None):
+        """Read a section of the game until options or an ending is found
+
+        :param start_key: The key for the starting stitch of the story. Leaving
+            this blank will start the story from the beginning
+        :type start_key: str
+        :param _ret_list: Paragraphs to put before the section
+        :type _ret_list: list
+        :return: A list of paragraphs with the options as the final paragrah
+            for this section
+        :rtype: list
+        :raises KeyError: if start_key can not be found in the story
+        """
+        if not _ret_list or not isinstance(_ret_list, list):
+            _ret_list = []
+        return _ret_list + self.apply_section(self.render_section(start_key))
+
+    def _option_hashtag(self, option):
+        """Get the hashtag for an option
+
+        :param option: The option from the stitch
+        :type option: dict
+        :return: The hashtag in uppercase, or None if the option does not have
+            exactly one hashtag
+        :rtype: str
+        """
+        hash_tags = HASHTAG_PATTERN.findall(option['option'])
+        if len(hash_tags) == 1:
+            return hash_tags[0].upper()
         else:
-            LOGGER.warning(f"Could not find {start_key} in the game")
-            raise KeyError(f"Could not find {start_key} in the game")
+            return None
+
+    def render_options_prompt(self, key, hashtags=None, flags=None):
+        """Work out the options prompt for a stitch again without changing the
+        story flags or writing to the log
+
+        Only options whose conditions pass are included. If fewer than two of
+        them have the hashtags asked for, every option that passes is
+        included instead. If the conditions leave only one option, that
+        option is followed.
+
+        :param key: The key of the stitch containing the options
+        :type key: str
+        :param hashtags: Only include the options with these hashtags
+        :type hashtags: list
+        :param flags: The flags to check the options against, defaults to the
+            story flags
+        :type flags: list
+        :return: The prompt as a section like render_section, adding no flags,
+            or the section for the only option that can be followed
+        :rtype: tuple
+        :raises KeyError: if key could not be found in the game
+        """
+        if flags is None:
+            flags = self.flags
+        stitch = self._get_stitch(key)
+        if not stitch:
+            LOGGER.warning(f"Could not find {key} in the game")
+            raise KeyError(f"Could not find {key} in the game")
+        options = [x for x in stitch.options if
+                   self._pass_option_conditions(x, flags)]
+        if len(options) == 1:
+            # There is nothing to choose between
+            return self.render_section(options[0]['linkPath'], flags)
+        state = f"{stitch.key} - {json.dumps(flags)}"
+        if hashtags:
+            runoff = [x for x in options if self._option_hashtag(x) in
+                      hashtags]
+            # A runoff needs at least two options that can be shown
+            if len(runoff) > 1:
+                options = runoff
+                hashtags = [self._option_hashtag(x) for x in runoff]
+                state += f" - {json.dumps(hashtags)}"
+        return self._get_options(options, flags), [], [state]
+
+    def get_options_prompt(self, key, hashtags=None):
+        """Get the options prompt for a stitch again, without walking the
+        section or adding its flags a second time
+
+        The game state is written to the log as it is by get_section, along
+        with the hashtags if the prompt is limited to them.
+
+        :param key: The key of the stitch containing the options
+        :type key: str
+        :param hashtags: Only include the options with these hashtags
+        :type hashtags: list
+        :return: The options prompt as a single paragraph list, or the section
+            for the only option that can be followed
+        :rtype: list
+        :raises KeyError: if key could not be found in the game
+        """
+        return self.apply_section(self.render_options_prompt(key, hashtags))
 
     def get_hashtags(self, key):
         """Get the hashtags associated with the options
@@ -322,12 +637,10 @@ class TWGBStory(object):
             stitch = self._get_stitch(key)
             if stitch:
                 ret_dict = {}
-                pattern = re.compile('#[0-9a-zA-Z]+')
                 for option in stitch.options:
-                    hash_tags = pattern.findall(option['option'])
-                    stitch_key = option['linkPath']
-                    if len(hash_tags) == 1:
-                        ret_dict[hash_tags[0].upper()] = stitch_key
+                    hash_tag = self._option_hashtag(option)
+                    if hash_tag:
+                        ret_dict[hash_tag] = option['linkPath']
                     else:
                         LOGGER.warning(f"Expected to find 1 hashtag in "
                                        f"{option['option']}")
@@ -339,6 +652,71 @@ class TWGBStory(object):
         else:
             raise KeyError('string expected as key')
 
+    def reload(self, bookmark=''):
+        """Reload the story if the source has changed since it was loaded
+
+        The first reload always reads the source, as the source marker is
+        not looked up when the story is loaded. Only stitches that were added
+        or changed are rebuilt, unchanged stitches are carried over. The new
+        stitches are swapped in at once, and only after checking that the
+        bookmark can still be found and that every current flag can still be
+        set by the story.
+
+        :param bookmark: The stitch key the game is currently waiting on
+        :type bookmark: str
+        :return: True if the story was reloaded, False if it was unchanged
+        :rtype: bool
+        :raises KeyError: if the bookmark can not be found in the new story
+        :raises ValueError: if a current flag is no longer set in the new story
+        """
+        source_stamp = self._get_source_stamp()
+        if source_stamp is not None and source_stamp == self._source_stamp:
+            return False
+        source_data = self._load_source()
+        stitch_data = source_data['data']['stitches']
+        if (source_data['title'],
+                source_data['data']['editorData']['authorName'],
+                source_data['data']['initial'], stitch_data) == (
+                self.title, self.author, self.initial, self._stitch_data):
+            # Nothing was edited, so just remember the source as it is now
+            self._source_stamp = source_stamp
+            return False
+        if bookmark and bookmark not in stitch_data:
+            LOGGER.warning(f"Could not find {bookmark} in the reloaded game")
+            raise KeyError(f"Could not find {bookmark} in the reloaded game")
+        flag_names = set()
+        for stitch in stitch_data.values():
+            flag_names.update(x['flagName'] for x in stitch['content'] if
+                              isinstance(x, dict) and 'flagName' in x)
+        missing_flags = [x for x in self.flags if x not in flag_names]
+        if missing_flags:
+            LOGGER.warning(f"Flags {missing_flags} are not in the reloaded "
+                           f"game")
+            raise ValueError(f"Flags {missing_flags} are not in the reloaded "
+                             f"game")
+        # Rebuild only what changed, reusing the unchanged stitch objects
+        old_stitches = {x.key: x for x in self.stitches}
+        stitches = []
+        changed = []
+        for key in stitch_data:
+            if key in old_stitches and \
+                    stitch_data[key] == self._stitch_data.get(key):
+                stitches.append(old_stitches[key])
+            else:
+                stitches.append(TWGBStitch(key, stitch_data[key]))
+                changed.append(key)
+        removed = [x for x in old_stitches if x not in stitch_data]
+        LOGGER.debug(f"Reloaded {self.source}, changed {changed}, removed "
+                     f"{removed}")
+        # Swap everything over in one go
+        (self.title, self.author, self.initial, self._stitch_data,
+         self.stitches, self._source_stamp) = (
+            source_data['title'],
+            source_data['data']['editorData']['authorName'],
+            source_data['data']['initial'], stitch_data, stitches,
+            source_stamp)
+        return True
+
     def set_flags(self, flags):
         """Set the flags for the story externally
 